@@ -0,0 +1,10 @@
+-- Add phone_hash lookup column to user_consents tables created before
+-- phone numbers were encrypted. Run once per database before deploying:
+--
+--   psql "$DATABASE_URL" -f migrations/0001_add_consent_phone_hash.sql
+--
+-- Safe to re-run. Existing rows get their hash lazily on first lookup
+-- (ConsentManager.get_user_consent).
+
+ALTER TABLE user_consents ADD COLUMN IF NOT EXISTS phone_hash VARCHAR(64);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_consents_phone_hash ON user_consents(phone_hash);
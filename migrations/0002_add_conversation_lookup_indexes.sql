@@ -0,0 +1,14 @@
+-- Indexes for per-user lookups on conversation_history (data deletion,
+-- export and the retention scan). The server creates them on startup if
+-- they are missing, which blocks writes to a large table while they build;
+-- run this first to build them without locking:
+--
+--   psql "$DATABASE_URL" -f migrations/0002_add_conversation_lookup_indexes.sql
+--
+-- Safe to re-run. CONCURRENTLY can't run inside a transaction block, so
+-- don't wrap this file in BEGIN/COMMIT.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conv_hash_ts
+    ON conversation_history(phone_hash, timestamp DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conv_phone_ts
+    ON conversation_history(phone_number, timestamp DESC);
@@ -1,5 +1,5 @@
 """Character personalities module."""
 
-from .personality import CharacterPersonality
+from .personality import CharacterPersonality, get_personality
 
-__all__ = ["CharacterPersonality"]
+__all__ = ["CharacterPersonality", "get_personality"]
@@ -1,14 +1,93 @@
 """Character personality management - loads prompts from files."""
 
 import os
+import re
 import json
+import mmap
+import logging
 from pathlib import Path
 from typing import Dict, Optional, List
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is missing
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # optional: the token index below is used instead
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+# Word tokenizer used for verified-knowledge lookups
+_WORD_RE = re.compile(r"\w+")
+
+# Japanese/Chinese text has no word boundaries, so names containing these
+# characters are matched by substring instead of by token
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]")
+
+_WORD_CHAR_RE = re.compile(r"\w")
+
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] is not glued to word characters on either side."""
+    return not (
+        (start > 0 and _WORD_CHAR_RE.match(text, start - 1))
+        or _WORD_CHAR_RE.match(text, end)
+    )
+
+
+def _contains_whole_word(text: str, name: str) -> bool:
+    """Whether name occurs in text as whole words ("art" is not in "start")."""
+    start = text.find(name)
+    while start != -1:
+        if _is_whole_word(text, start, start + len(name)):
+            return True
+        start = text.find(name, start + 1)
+    return False
+
+# Display names and descriptions per character
+_DISPLAY_NAMES = {
+    "botan": "Botan 🌸",
+    "kasho": "Kasho 🎵",
+    "yuri": "Yuri 📚"
+}
+
+_DESCRIPTIONS = {
+    "botan": "Social media enthusiast and entertainment expert",
+    "kasho": "Music professional and life advisor",
+    "yuri": "Book lover and creative thinker"
+}
+
+
+def _read_json_file(path: Path) -> Dict:
+    """Parse a JSON file straight from a read-only mmap of the page cache."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if orjson is not None:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+            return json.loads(mm[:])
+
 
 class CharacterPersonality:
     """Manage character personalities by loading prompts from files."""
 
+    __slots__ = (
+        "prompts_dir",
+        "verified_knowledge_file",
+        "semantic_search",
+        "_cache",
+        "_knowledge",
+        "_name_to_fact",
+        "_name_tokens",
+        "_substring_names",
+        "_automaton",
+        "_semantic_index",
+        "_semantic_keys",
+    )
+
     # Character names
     BOTAN = "botan"
     KASHO = "kasho"
@@ -16,12 +95,29 @@ class CharacterPersonality:
 
     ALL_CHARACTERS = [BOTAN, KASHO, YURI]
 
-    def __init__(self, prompts_dir: Optional[Path] = None):
+    # O(1) membership check for the per-message validation
+    _ALL_CHARACTERS_SET = frozenset(ALL_CHARACTERS)
+
+    # Header injected above any relevant verified facts
+    _KNOWLEDGE_HEADER = (
+        "## VERIFIED KNOWLEDGE (from past conversations)\n\n"
+        "The following facts have been verified with high confidence. You can reference them confidently:\n\n"
+    )
+
+    # Semantic fallback for verified knowledge (used only when no name matches)
+    SEMANTIC_TOP_K = 3
+    SEMANTIC_MIN_SCORE = 0.5
+    SEMANTIC_MIN_MESSAGE_LENGTH = 12
+
+    def __init__(self, prompts_dir: Optional[Path] = None, semantic_search: bool = False):
         """
         Initialize character personality loader.
 
         Args:
             prompts_dir: Directory containing prompt files (default: project_root/prompts/)
+            semantic_search: Embed verified facts and fall back to similarity
+                search when no fact name appears in the message (needs
+                sentence-transformers + faiss)
         """
         if prompts_dir is None:
             # Get project root (4 levels up from this file)
@@ -30,6 +126,14 @@ class CharacterPersonality:
 
         self.prompts_dir = prompts_dir
         self._cache: Dict[str, str] = {}
+        self._knowledge: Dict = {}
+        self._name_to_fact: Dict[str, Dict] = {}
+        self._name_tokens: Dict[str, List[str]] = {}
+        self._substring_names: List[str] = []
+        self._automaton = None
+        self.semantic_search = semantic_search
+        self._semantic_index = None
+        self._semantic_keys: List[str] = []
         self.verified_knowledge_file = prompts_dir / "verified_knowledge.json"
 
         # Verify prompts directory exists
@@ -39,6 +143,124 @@ class CharacterPersonality:
                 "Please ensure character prompt files exist in prompts/ directory."
             )
 
+        # Preload everything once so the per-message path never touches disk
+        self._load_prompts()
+        self._load_verified_knowledge()
+
+    def _load_prompts(self) -> None:
+        """Read common + character prompts from disk into the cache."""
+        self._cache.clear()
+
+        # Load common prompt (shared by all sisters)
+        common_prompt_file = self.prompts_dir / "common_system_prompt.txt"
+        common_prompt = ""
+
+        if common_prompt_file.exists():
+            common_prompt = common_prompt_file.read_text(encoding='utf-8').strip()
+
+        for character in self.ALL_CHARACTERS:
+            prompt_file = self.prompts_dir / f"{character}_system_prompt.txt"
+
+            # Missing files are reported lazily by get_system_prompt
+            if not prompt_file.exists():
+                continue
+
+            character_prompt = prompt_file.read_text(encoding='utf-8').strip()
+
+            # Combine: character-specific first, then common rules
+            self._cache[character] = f"{character_prompt}\n\n---\n\n{common_prompt}" if common_prompt else character_prompt
+
+    def _load_verified_knowledge(self) -> None:
+        """Parse verified_knowledge.json once (empty dict if missing or invalid)."""
+        self._knowledge = {}
+
+        if self.verified_knowledge_file.exists():
+            try:
+                self._knowledge = _read_json_file(self.verified_knowledge_file)
+            except (ValueError, OSError):
+                # ValueError covers invalid/empty JSON (and mmap of an empty file)
+                self._knowledge = {}
+
+        # Always rebuild, so a reload after the file is removed drops stale facts
+        self._build_knowledge_index()
+
+    def _build_knowledge_index(self) -> None:
+        """
+        Index verified facts by lowercased entity name.
+
+        When pyahocorasick is installed, all names go into one Aho-Corasick
+        automaton so a message is matched in a single pass (hits are then
+        kept only on word boundaries, as in the token lookup). Otherwise
+        single-word names are looked up directly by message token, multi-word
+        names are keyed by their first token, and CJK names (no word
+        boundaries) fall back to a substring scan.
+        """
+        self._name_to_fact = {}
+        self._name_tokens = {}
+        self._substring_names = []
+        self._automaton = None
+
+        for category, facts in self._knowledge.items():
+            if category == "last_updated":
+                continue
+
+            if not isinstance(facts, dict):
+                continue
+
+            for name, data in facts.items():
+                key = name.lower()
+                self._name_to_fact[key] = {
+                    "name": name,
+                    "category": category,
+                    "details": data.get("details", {}),
+                    "confidence": data.get("confidence", 0.0)
+                }
+
+                tokens = _WORD_RE.findall(key)
+                if not tokens or _CJK_RE.search(key):
+                    self._substring_names.append(key)
+                elif len(tokens) > 1 or tokens[0] != key:
+                    self._name_tokens.setdefault(tokens[0], []).append(key)
+
+        if ahocorasick is not None and self._name_to_fact:
+            automaton = ahocorasick.Automaton()
+            for key in self._name_to_fact:
+                automaton.add_word(key, key)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+        self._build_semantic_index()
+
+    def _build_semantic_index(self) -> None:
+        """Embed every verified fact for the semantic fallback (if enabled)."""
+        self._semantic_index = None
+        self._semantic_keys = []
+
+        if not self.semantic_search or not self._name_to_fact:
+            return
+
+        keys = list(self._name_to_fact)
+        texts = [self._describe_fact(self._name_to_fact[key]) for key in keys]
+
+        try:
+            from .semantic_index import SemanticKnowledgeIndex
+            self._semantic_index = SemanticKnowledgeIndex(texts)
+            self._semantic_keys = keys
+        except ImportError as e:
+            logger.warning(f"Semantic knowledge search disabled (missing dependency: {e})")
+
+    @staticmethod
+    def _describe_fact(fact: Dict) -> str:
+        """Text embedded for a fact: name, category and descriptive details."""
+        details = fact["details"]
+        parts = [fact["name"], fact["category"]]
+        for field in ("type", "location", "notes"):
+            if details.get(field):
+                parts.append(str(details[field]))
+        if details.get("specialties"):
+            parts.append(", ".join(details["specialties"]))
+        return " ".join(parts)
+
     def get_system_prompt(self, character: str, user_message: Optional[str] = None) -> str:
         """
         Load system prompt for a character.
@@ -55,39 +277,21 @@ class CharacterPersonality:
             FileNotFoundError: If prompt file doesn't exist
         """
         character = character.lower()
-
-        if character not in self.ALL_CHARACTERS:
-            raise ValueError(
-                f"Unknown character: {character}. "
-                f"Valid options: {', '.join(self.ALL_CHARACTERS)}"
-            )
-
-        # Check cache first (only for base prompt without verified knowledge)
-        if character not in self._cache:
-            # Load common prompt (shared by all sisters)
-            common_prompt_file = self.prompts_dir / "common_system_prompt.txt"
-            common_prompt = ""
-
-            if common_prompt_file.exists():
-                with open(common_prompt_file, 'r', encoding='utf-8') as f:
-                    common_prompt = f.read().strip()
-
-            # Load character-specific prompt
-            prompt_file = self.prompts_dir / f"{character}_system_prompt.txt"
-
-            if not prompt_file.exists():
-                raise FileNotFoundError(
-                    f"Prompt file not found: {prompt_file}\n"
-                    f"Expected file: {character}_system_prompt.txt"
+        base_prompt = self._cache.get(character)
+
+        # Slow path: only unknown characters or missing prompt files miss the cache
+        if base_prompt is None:
+            if character not in self._ALL_CHARACTERS_SET:
+                raise ValueError(
+                    f"Unknown character: {character}. "
+                    f"Valid options: {', '.join(self.ALL_CHARACTERS)}"
                 )
 
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                character_prompt = f.read().strip()
-
-            # Combine: character-specific first, then common rules
-            self._cache[character] = f"{character_prompt}\n\n---\n\n{common_prompt}" if common_prompt else character_prompt
-
-        base_prompt = self._cache[character]
+            prompt_file = self.prompts_dir / f"{character}_system_prompt.txt"
+            raise FileNotFoundError(
+                f"Prompt file not found: {prompt_file}\n"
+                f"Expected file: {character}_system_prompt.txt"
+            )
 
         # Inject verified knowledge if user message provided
         verified_knowledge = self._get_relevant_verified_knowledge(user_message) if user_message else ""
@@ -107,79 +311,97 @@ class CharacterPersonality:
         Returns:
             Formatted verified knowledge string (empty if no relevant facts found)
         """
-        if not user_message or not self.verified_knowledge_file.exists():
-            return ""
-
-        try:
-            with open(self.verified_knowledge_file, 'r', encoding='utf-8') as f:
-                knowledge = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
+        name_to_fact = self._name_to_fact
+        if not user_message or not name_to_fact:
             return ""
 
-        # Search all categories for relevant facts
-        relevant_facts = []
         user_message_lower = user_message.lower()
 
-        for category, facts in knowledge.items():
-            if category == "last_updated":
-                continue
+        # Ordered set of matched names (dict keeps insertion order)
+        matched: Dict[str, None] = {}
+
+        automaton = self._automaton
+        if automaton is not None:
+            # Single pass over the message regardless of knowledge base size.
+            # Raw substring hits are kept only on word boundaries (except CJK
+            # names), so results match the token lookup below
+            for end_index, name in automaton.iter(user_message_lower):
+                if name in matched:
+                    continue
+                if (_CJK_RE.search(name) or not _WORD_RE.search(name)
+                        or _is_whole_word(user_message_lower, end_index - len(name) + 1, end_index + 1)):
+                    matched[name] = None
+        else:
+            name_tokens = self._name_tokens
 
-            if not isinstance(facts, dict):
-                continue
+            for token in _WORD_RE.findall(user_message_lower):
+                if token in name_to_fact:
+                    matched[token] = None
 
-            for name, data in facts.items():
-                # Check if name appears in user message
-                if name.lower() in user_message_lower:
-                    relevant_facts.append({
-                        "name": name,
-                        "category": category,
-                        "details": data.get("details", {}),
-                        "confidence": data.get("confidence", 0.0)
-                    })
+                # Multi-word names: confirm the full name only when its first token appears
+                for name in name_tokens.get(token, ()):
+                    if _contains_whole_word(user_message_lower, name):
+                        matched[name] = None
+
+            for name in self._substring_names:
+                if name in user_message_lower:
+                    matched[name] = None
+
+        # Nothing matched by name: try paraphrases ("that noodle shop") via embeddings
+        if (not matched and self._semantic_index is not None
+                and len(user_message) >= self.SEMANTIC_MIN_MESSAGE_LENGTH):
+            for fact_id, _ in self._semantic_index.search(
+                user_message, k=self.SEMANTIC_TOP_K, min_score=self.SEMANTIC_MIN_SCORE
+            ):
+                matched[self._semantic_keys[fact_id]] = None
+
+        relevant_facts = [name_to_fact[name] for name in matched]
 
         if not relevant_facts:
             return ""
 
         # Format verified knowledge for injection
-        knowledge_text = "## VERIFIED KNOWLEDGE (from past conversations)\n\n"
-        knowledge_text += "The following facts have been verified with high confidence. You can reference them confidently:\n\n"
+        parts = [self._KNOWLEDGE_HEADER]
 
         for fact in relevant_facts:
-            knowledge_text += f"**{fact['name']}** ({fact['category']}):\n"
+            parts.append(f"**{fact['name']}** ({fact['category']}):\n")
 
             details = fact['details']
             if details.get('location'):
-                knowledge_text += f"  - Location: {details['location']}\n"
+                parts.append(f"  - Location: {details['location']}\n")
             if details.get('type'):
-                knowledge_text += f"  - Type: {details['type']}\n"
+                parts.append(f"  - Type: {details['type']}\n")
             if details.get('specialties'):
-                specialties = ', '.join(details['specialties'])
-                knowledge_text += f"  - Known for: {specialties}\n"
+                parts.append(f"  - Known for: {', '.join(details['specialties'])}\n")
             if details.get('notes'):
-                knowledge_text += f"  - Notes: {details['notes']}\n"
+                parts.append(f"  - Notes: {details['notes']}\n")
 
-            knowledge_text += f"  - Confidence: {fact['confidence']:.0%}\n\n"
+            parts.append(f"  - Confidence: {fact['confidence']:.0%}\n\n")
 
-        return knowledge_text
+        return "".join(parts)
 
     def reload_prompts(self) -> None:
-        """Clear cache and reload all prompts from files."""
-        self._cache.clear()
+        """Reload all prompts and verified knowledge from files."""
+        self._load_prompts()
+        self._load_verified_knowledge()
 
     def get_character_display_name(self, character: str) -> str:
         """Get display name for a character."""
-        names = {
-            self.BOTAN: "Botan 🌸",
-            self.KASHO: "Kasho 🎵",
-            self.YURI: "Yuri 📚"
-        }
-        return names.get(character.lower(), character.capitalize())
+        return _DISPLAY_NAMES.get(character.lower(), character.capitalize())
 
     def get_character_description(self, character: str) -> str:
         """Get short description of a character."""
-        descriptions = {
-            self.BOTAN: "Social media enthusiast and entertainment expert",
-            self.KASHO: "Music professional and life advisor",
-            self.YURI: "Book lover and creative thinker"
-        }
-        return descriptions.get(character.lower(), "")
+        return _DESCRIPTIONS.get(character.lower(), "")
+
+
+# Process-wide instance so prompt caches and knowledge indexes are built once
+_personality: Optional[CharacterPersonality] = None
+
+
+def get_personality() -> CharacterPersonality:
+    """Return the shared CharacterPersonality, creating it on first call."""
+    global _personality
+    if _personality is None:
+        from ..config import Config
+        _personality = CharacterPersonality(semantic_search=Config.SEMANTIC_KNOWLEDGE_SEARCH)
+    return _personality
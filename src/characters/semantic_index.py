@@ -0,0 +1,64 @@
+"""Semantic search over verified knowledge (optional embedding + FAISS index)."""
+
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticKnowledgeIndex:
+    """
+    Embed fact descriptions once and retrieve the closest ones for a message.
+
+    Requires the optional ``sentence-transformers`` and ``faiss-cpu``
+    packages; construction raises ImportError if they are missing.
+    """
+
+    DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+    def __init__(self, texts: List[str], model_name: str = DEFAULT_MODEL):
+        """
+        Build the index.
+
+        Args:
+            texts: One description per fact (index position = fact id)
+            model_name: sentence-transformers model used for embeddings
+        """
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+
+        # Normalized vectors + inner product = cosine similarity
+        vectors = self._encode(texts)
+        self._index = faiss.IndexFlatIP(vectors.shape[1])
+        self._index.add(vectors)
+
+        logger.info(f"Semantic knowledge index ready ({len(texts)} facts, model: {model_name})")
+
+    def _encode(self, texts: List[str]):
+        return self._model.encode(
+            texts,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        ).astype("float32")
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.5) -> List[Tuple[int, float]]:
+        """
+        Find facts similar to a query.
+
+        Args:
+            query: User message
+            k: Maximum number of results
+            min_score: Minimum cosine similarity to keep a result
+
+        Returns:
+            List of (fact id, score), best first
+        """
+        scores, ids = self._index.search(self._encode([query]), k)
+
+        return [
+            (int(i), float(score))
+            for i, score in zip(ids[0], scores[0])
+            if i >= 0 and score >= min_score
+        ]
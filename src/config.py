@@ -1,69 +1,138 @@
 """Configuration settings for Sisters-On-WhatsApp."""
 
 import os
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 
-class Config:
+def _env_bool(value: str) -> bool:
+    """Parse a "true"/"false" environment flag."""
+    return value.lower() == "true"
+
+
+class _LazyConfig(type):
+    """Metaclass that reads settings from the environment on first access.
+
+    Values are memoized on the class, so later reads are plain attribute
+    lookups. Nothing is read at import time, which lets load_dotenv() or
+    tests change the environment before a setting is first used.
+    """
+
+    def __getattr__(cls, name: str) -> Any:
+        spec = cls.__dict__.get("_SPEC", {})
+        if name not in spec:
+            raise AttributeError(f"{cls.__name__} has no setting {name!r}")
+
+        env_var, default, caster = spec[name]
+        raw = os.getenv(env_var, default)
+        value = caster(raw) if raw is not None else None
+        setattr(cls, name, value)
+        return value
+
+
+class Config(metaclass=_LazyConfig):
     """Application configuration."""
 
     # Server settings
-    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
-    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
-    ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
+    SERVER_HOST: str
+    SERVER_PORT: int
+    ENVIRONMENT: str
 
     # Twilio settings
-    TWILIO_ACCOUNT_SID: Optional[str] = os.getenv("TWILIO_ACCOUNT_SID")
-    TWILIO_AUTH_TOKEN: Optional[str] = os.getenv("TWILIO_AUTH_TOKEN")
-    TWILIO_WHATSAPP_NUMBER: str = os.getenv("TWILIO_WHATSAPP_NUMBER", "whatsapp:+14155238886")
+    TWILIO_ACCOUNT_SID: Optional[str]
+    TWILIO_AUTH_TOKEN: Optional[str]
+    TWILIO_WHATSAPP_NUMBER: str
 
     # Admin notifications
-    ADMIN_PHONE_NUMBER: Optional[str] = os.getenv("ADMIN_PHONE_NUMBER")
-    ENABLE_ADMIN_NOTIFICATIONS: bool = os.getenv("ENABLE_ADMIN_NOTIFICATIONS", "true").lower() == "true"
+    ADMIN_PHONE_NUMBER: Optional[str]
+    ENABLE_ADMIN_NOTIFICATIONS: bool
 
     # LLM settings
-    PRIMARY_LLM: Optional[str] = os.getenv("PRIMARY_LLM")
-    KIMI_API_KEY: Optional[str] = os.getenv("KIMI_API_KEY")
-    KIMI_MODEL: Optional[str] = os.getenv("KIMI_MODEL")
-    OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
-    OPENAI_MODEL: Optional[str] = os.getenv("OPENAI_MODEL")
+    PRIMARY_LLM: Optional[str]
+    KIMI_API_KEY: Optional[str]
+    KIMI_MODEL: Optional[str]
+    OPENAI_API_KEY: Optional[str]
+    OPENAI_MODEL: Optional[str]
 
     # Grok settings (for trend research & fact-checking)
-    XAI_API_KEY: Optional[str] = os.getenv("XAI_API_KEY")
-    GROK_MODEL: Optional[str] = os.getenv("GROK_MODEL")
-    GROK_ENABLED: bool = os.getenv("GROK_ENABLED", "true").lower() == "true"
+    XAI_API_KEY: Optional[str]
+    GROK_MODEL: Optional[str]
+    GROK_ENABLED: bool
 
     # Database settings
-    POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
-    POSTGRES_PORT: int = int(os.getenv("POSTGRES_PORT", "5432"))
-    POSTGRES_DB: str = os.getenv("POSTGRES_DB", "sisters_on_whatsapp")
-    POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
-    POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "")
+    POSTGRES_HOST: str
+    POSTGRES_PORT: int
+    POSTGRES_DB: str
+    POSTGRES_USER: str
+    POSTGRES_PASSWORD: str
 
     # Character routing settings
     # Higher threshold = harder to switch characters (better continuity)
     # 0.4 = good balance between continuity and topic switching
-    CHARACTER_SWITCH_THRESHOLD: float = float(os.getenv("CHARACTER_SWITCH_THRESHOLD", "0.4"))
-    CONVERSATION_HISTORY_LIMIT: int = int(os.getenv("CONVERSATION_HISTORY_LIMIT", "10"))
+    CHARACTER_SWITCH_THRESHOLD: float
+    CONVERSATION_HISTORY_LIMIT: int
 
     # LLM generation settings
-    LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.8"))
-    LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "500"))
+    LLM_TEMPERATURE: float
+    LLM_MAX_TOKENS: int
+
+    # Verified knowledge: embedding-based fallback when no fact name matches
+    SEMANTIC_KNOWLEDGE_SEARCH: bool
 
     # Content moderation
-    MODERATION_STRICT_MODE: bool = os.getenv("MODERATION_STRICT_MODE", "true").lower() == "true"
+    MODERATION_STRICT_MODE: bool
 
     # Response messages (configurable for localization/customization)
-    MODERATION_BLOCKED_MESSAGE: str = os.getenv(
-        "MODERATION_BLOCKED_MESSAGE",
-        "I'm sorry, but I can't respond to that message as it violates our content policy. "
-        "Let's talk about something else! 😊"
-    )
-
-    ERROR_MESSAGE: str = os.getenv(
-        "ERROR_MESSAGE",
-        "Oops! Something went wrong on my end. Can you try again? 😅"
-    )
+    MODERATION_BLOCKED_MESSAGE: str
+    ERROR_MESSAGE: str
+
+    # Setting name -> (environment variable, default, caster)
+    _SPEC: Dict[str, Tuple[str, Optional[str], Callable[[str], Any]]] = {
+        "SERVER_HOST": ("SERVER_HOST", "0.0.0.0", str),
+        "SERVER_PORT": ("SERVER_PORT", "8000", int),
+        "ENVIRONMENT": ("ENVIRONMENT", "development", str),
+        "TWILIO_ACCOUNT_SID": ("TWILIO_ACCOUNT_SID", None, str),
+        "TWILIO_AUTH_TOKEN": ("TWILIO_AUTH_TOKEN", None, str),
+        "TWILIO_WHATSAPP_NUMBER": ("TWILIO_WHATSAPP_NUMBER", "whatsapp:+14155238886", str),
+        "ADMIN_PHONE_NUMBER": ("ADMIN_PHONE_NUMBER", None, str),
+        "ENABLE_ADMIN_NOTIFICATIONS": ("ENABLE_ADMIN_NOTIFICATIONS", "true", _env_bool),
+        "PRIMARY_LLM": ("PRIMARY_LLM", None, str),
+        "KIMI_API_KEY": ("KIMI_API_KEY", None, str),
+        "KIMI_MODEL": ("KIMI_MODEL", None, str),
+        "OPENAI_API_KEY": ("OPENAI_API_KEY", None, str),
+        "OPENAI_MODEL": ("OPENAI_MODEL", None, str),
+        "XAI_API_KEY": ("XAI_API_KEY", None, str),
+        "GROK_MODEL": ("GROK_MODEL", None, str),
+        "GROK_ENABLED": ("GROK_ENABLED", "true", _env_bool),
+        "POSTGRES_HOST": ("POSTGRES_HOST", "localhost", str),
+        "POSTGRES_PORT": ("POSTGRES_PORT", "5432", int),
+        "POSTGRES_DB": ("POSTGRES_DB", "sisters_on_whatsapp", str),
+        "POSTGRES_USER": ("POSTGRES_USER", "postgres", str),
+        "POSTGRES_PASSWORD": ("POSTGRES_PASSWORD", "", str),
+        "CHARACTER_SWITCH_THRESHOLD": ("CHARACTER_SWITCH_THRESHOLD", "0.4", float),
+        "CONVERSATION_HISTORY_LIMIT": ("CONVERSATION_HISTORY_LIMIT", "10", int),
+        "LLM_TEMPERATURE": ("LLM_TEMPERATURE", "0.8", float),
+        "LLM_MAX_TOKENS": ("LLM_MAX_TOKENS", "500", int),
+        "SEMANTIC_KNOWLEDGE_SEARCH": ("SEMANTIC_KNOWLEDGE_SEARCH", "false", _env_bool),
+        "MODERATION_STRICT_MODE": ("MODERATION_STRICT_MODE", "true", _env_bool),
+        "MODERATION_BLOCKED_MESSAGE": (
+            "MODERATION_BLOCKED_MESSAGE",
+            "I'm sorry, but I can't respond to that message as it violates our content policy. "
+            "Let's talk about something else! 😊",
+            str,
+        ),
+        "ERROR_MESSAGE": (
+            "ERROR_MESSAGE",
+            "Oops! Something went wrong on my end. Can you try again? 😅",
+            str,
+        ),
+    }
+
+    @classmethod
+    def reload(cls) -> None:
+        """Forget memoized settings so the next access re-reads the environment."""
+        for name in cls._SPEC:
+            if name in cls.__dict__:
+                delattr(cls, name)
 
     @classmethod
     def get_database_url(cls) -> str:
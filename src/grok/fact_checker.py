@@ -5,10 +5,13 @@ Uses Grok API to verify factual accuracy of user statements
 Prevents misinformation propagation in conversation memory
 """
 
+import asyncio
+import functools
 import logging
 import re
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Hashable, List, Optional
 from .grok_utils import ask_grok_no_search
 
 logger = logging.getLogger(__name__)
@@ -18,8 +21,9 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 PROMPTS_DIR = PROJECT_ROOT / "prompts" / "grok"
 
 
+@functools.lru_cache(maxsize=None)
 def _load_prompt_template(filename: str) -> str:
-    """Load prompt template from file, return empty string if not found"""
+    """Load prompt template from file (read once per process), return empty string if not found"""
     prompt_file = PROMPTS_DIR / filename
     if prompt_file.exists():
         with open(prompt_file, 'r', encoding='utf-8') as f:
@@ -29,6 +33,48 @@ def _load_prompt_template(filename: str) -> str:
         return ""
 
 
+# Serious topics include: health, finance, legal, safety
+SERIOUS_TOPICS = [
+    # Health & Medical
+    "health", "medical", "disease", "medicine", "treatment", "symptom",
+    "hospital", "doctor", "surgery", "cancer", "diagnosis",
+    "vaccine", "prescription", "therapy",
+
+    # Finance
+    "money", "investment", "debt", "loan", "stock", "crypto",
+    "credit", "mortgage", "bankruptcy", "fraud", "scam",
+    "bitcoin", "trading", "portfolio",
+
+    # Legal
+    "law", "legal", "crime", "police", "court", "lawyer",
+    "illegal", "arrest", "lawsuit", "regulation", "copyright",
+
+    # Safety
+    "disaster", "earthquake", "fire", "flood", "emergency",
+    "accident", "injury", "danger", "warning", "evacuation"
+]
+
+# Single alternation scanned once per message. Only the start of the word is
+# anchored, so inflections still match ("doctors", "cryptocurrency") but
+# mid-word hits ("campfire" -> "fire") do not. Longest keywords go first so
+# the logged topic is the most specific one.
+_SERIOUS_TOPIC_RE = re.compile(
+    r"\b(" + "|".join(map(re.escape, sorted(SERIOUS_TOPICS, key=len, reverse=True))) + r")",
+    re.IGNORECASE
+)
+
+# Grok's "INCORRECT: the correct information is ..." answer format
+_CORRECT_INFO_RE = re.compile(
+    r'INCORRECT[:\s]*(?:the\s+)?correct(?:\s+information)?(?:\s+is)?[:\s]+(.+)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Verdict markers in Grok output. The optional group captures the negation
+# ("IN" / "NO ") so one pass classifies the answer without upper-casing it.
+_DECISION_RE = re.compile(r'(IN)?CORRECT', re.IGNORECASE)
+_CONTRADICTION_RE = re.compile(r'(NO )?CONTRADICTION', re.IGNORECASE)
+
+
 class FactChecker:
     """
     Fact-checking system using Grok API (Layer 6)
@@ -37,6 +83,9 @@ class FactChecker:
     being stored in conversation memory or learned knowledge.
     """
 
+    # Max number of Grok verdicts kept in the in-process LRU
+    RESULT_CACHE_SIZE = 1024
+
     def __init__(self, enabled: bool = True):
         """
         Initialize FactChecker
@@ -45,11 +94,36 @@ class FactChecker:
             enabled: Whether fact-checking is enabled (default: True)
         """
         self.enabled = enabled
+        self._result_cache: "OrderedDict[Hashable, Dict]" = OrderedDict()
         if self.enabled:
+            # Preload templates so the first check doesn't hit the disk
+            _load_prompt_template("fact_check_query_template.txt")
+            _load_prompt_template("contradiction_check_template.txt")
             logger.info("✅ FactChecker initialized (Grok API enabled)")
         else:
             logger.warning("⚠️ FactChecker initialized (disabled)")
 
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize text for use as a cache key (case and whitespace)"""
+        return " ".join(text.lower().split())
+
+    def _get_cached(self, key: Hashable) -> Optional[Dict]:
+        """Return a cached verdict (marking it recently used), or None"""
+        cached = self._result_cache.get(key)
+        if cached is None:
+            return None
+        self._result_cache.move_to_end(key)
+        return dict(cached)
+
+    def _store_cached(self, key: Hashable, result: Dict) -> Dict:
+        """Store a verdict, evicting the least recently used entry when full"""
+        self._result_cache[key] = result
+        self._result_cache.move_to_end(key)
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        return dict(result)
+
     async def check(self, statement: str) -> Dict:
         """
         Fact-check a user statement
@@ -73,13 +147,24 @@ class FactChecker:
                 'verification': 'Fact-checking disabled'
             }
 
+        # Identical statements seen recently skip the Grok round-trip
+        cache_key = self._normalize(statement)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            logger.debug(f"Fact-check cache hit: {statement[:50]}...")
+            return cached
+
         try:
             # Load fact-check query template from file (Rule #1: NO HARDCODED PROMPTS)
             fact_check_template = _load_prompt_template("fact_check_query_template.txt")
             fact_check_query = fact_check_template.format(statement=statement)
 
             # Call Grok API (without X search, pure reasoning)
-            grok_result = ask_grok_no_search(question=fact_check_query)
+            grok_result = await ask_grok_no_search(
+                question=fact_check_query,
+                cache_text=cache_key,
+                cache_scope="fact_check_query_template.txt"
+            )
 
             if not grok_result:
                 logger.error("❌ Grok API call failed")
@@ -89,29 +174,33 @@ class FactChecker:
                     'verification': 'Grok API call failed'
                 }
 
-            # Parse result
-            if "CORRECT" in grok_result.upper() and "INCORRECT" not in grok_result.upper():
+            # Parse result: any INCORRECT wins, otherwise a bare CORRECT passes
+            decisions = _DECISION_RE.findall(grok_result)
+            is_incorrect = any(decisions)
+            is_correct = bool(decisions) and not is_incorrect
+
+            if is_correct:
                 logger.info(f"✅ Fact-check passed: {statement[:50]}...")
-                return {
+                return self._store_cached(cache_key, {
                     'passed': True,
                     'confidence': 0.9,
                     'verification': grok_result
-                }
+                })
 
-            elif "INCORRECT" in grok_result.upper():
+            elif is_incorrect:
                 # Extract correct information
                 correct_info = self._extract_correct_info(grok_result)
                 logger.warning(f"❌ Fact-check failed: {statement[:50]}...")
                 logger.info(f"   Correct info: {correct_info}")
-                return {
+                return self._store_cached(cache_key, {
                     'passed': False,
                     'confidence': 0.0,
                     'correct_info': correct_info,
                     'verification': grok_result
-                }
+                })
 
             else:
-                # Unknown/uncertain
+                # Unknown/uncertain: not cached, so the statement is re-checked next time
                 logger.info(f"⚠️ Fact-check uncertain: {statement[:50]}...")
                 return {
                     'passed': False,
@@ -127,6 +216,35 @@ class FactChecker:
                 'verification': f'Error: {str(e)}'
             }
 
+    async def check_many(self, statements: List[str]) -> List[Dict]:
+        """
+        Fact-check several statements concurrently
+
+        Duplicate (normalized) statements are checked once, and cached
+        verdicts are reused, so total latency is roughly one Grok call.
+
+        Args:
+            statements: Statements to verify
+
+        Returns:
+            One result dict per statement, in input order (see check())
+        """
+        keys = [self._normalize(statement) for statement in statements]
+
+        # First statement seen for each key that isn't already cached
+        todo: Dict[str, str] = {}
+        for statement, key in zip(statements, keys):
+            if key not in todo and key not in self._result_cache:
+                todo[key] = statement
+
+        checked = await asyncio.gather(*(self.check(statement) for statement in todo.values()))
+        results = dict(zip(todo.keys(), checked))
+
+        return [
+            dict(results[key]) if key in results else await self.check(statement)
+            for statement, key in zip(statements, keys)
+        ]
+
     def _extract_correct_info(self, grok_result: str) -> str:
         """
         Extract correct information from Grok's response
@@ -138,11 +256,7 @@ class FactChecker:
             Correct information string
         """
         # Look for pattern "INCORRECT: the correct information is ..."
-        match = re.search(
-            r'INCORRECT[:\s]*(?:the\s+)?correct(?:\s+information)?(?:\s+is)?[:\s]+(.+)',
-            grok_result,
-            re.IGNORECASE | re.DOTALL
-        )
+        match = _CORRECT_INFO_RE.search(grok_result)
 
         if match:
             return match.group(1).strip()
@@ -162,31 +276,10 @@ class FactChecker:
         Returns:
             True if serious topic detected
         """
-        SERIOUS_TOPICS = [
-            # Health & Medical
-            "health", "medical", "disease", "medicine", "treatment", "symptom",
-            "hospital", "doctor", "surgery", "cancer", "diagnosis",
-            "vaccine", "prescription", "therapy",
-
-            # Finance
-            "money", "investment", "debt", "loan", "stock", "crypto",
-            "credit", "mortgage", "bankruptcy", "fraud", "scam",
-            "bitcoin", "trading", "portfolio",
-
-            # Legal
-            "law", "legal", "crime", "police", "court", "lawyer",
-            "illegal", "arrest", "lawsuit", "regulation", "copyright",
-
-            # Safety
-            "disaster", "earthquake", "fire", "flood", "emergency",
-            "accident", "injury", "danger", "warning", "evacuation"
-        ]
-
-        message_lower = message.lower()
-        for topic in SERIOUS_TOPICS:
-            if topic in message_lower:
-                logger.info(f"🚨 Serious topic detected: {topic}")
-                return True
+        match = _SERIOUS_TOPIC_RE.search(message)
+        if match:
+            logger.info(f"🚨 Serious topic detected: {match.group(1).lower()}")
+            return True
 
         return False
 
@@ -218,29 +311,41 @@ class FactChecker:
             # Get most relevant memory (highest similarity)
             most_relevant = max(existing_memories, key=lambda x: x.get('similarity', 0))
 
+            existing_knowledge = most_relevant.get('content', most_relevant.get('meaning', ''))
+
+            # Same (new info, existing memory) pair seen recently skips the Grok round-trip
+            cache_key = ("contradiction", self._normalize(new_info), self._normalize(existing_knowledge))
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                if cached['contradicts']:
+                    cached['existing_memory'] = most_relevant
+                return cached
+
             # Load contradiction check template from file (Rule #1: NO HARDCODED PROMPTS)
             contradiction_template = _load_prompt_template("contradiction_check_template.txt")
             contradiction_check_prompt = contradiction_template.format(
-                existing_knowledge=most_relevant.get('content', most_relevant.get('meaning', '')),
+                existing_knowledge=existing_knowledge,
                 new_info=new_info
             )
 
-            grok_result = ask_grok_no_search(question=contradiction_check_prompt)
+            grok_result = await ask_grok_no_search(question=contradiction_check_prompt)
 
             if not grok_result:
                 logger.error("❌ Grok API call failed (contradiction check)")
                 return {'contradicts': False}
 
-            if "CONTRADICTION" in grok_result.upper() and "NO CONTRADICTION" not in grok_result.upper():
+            verdicts = _CONTRADICTION_RE.findall(grok_result)
+            if verdicts and not any(verdicts):
                 logger.warning(f"⚠️ Contradiction detected: {new_info[:50]}...")
-                return {
+                result = self._store_cached(cache_key, {
                     'contradicts': True,
-                    'existing_memory': most_relevant,
                     'reason': grok_result
-                }
+                })
+                result['existing_memory'] = most_relevant
+                return result
 
             logger.info(f"✅ No contradiction: {new_info[:50]}...")
-            return {'contradicts': False}
+            return self._store_cached(cache_key, {'contradicts': False})
 
         except Exception as e:
             logger.error(f"❌ Contradiction check error: {e}")
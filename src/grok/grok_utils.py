@@ -8,21 +8,83 @@ Provides core Grok API functionality for:
 """
 
 import os
+import functools
 import logging
 from pathlib import Path
-import requests
+from typing import Optional
+import httpx
 from dotenv import load_dotenv
+from ..utils.semantic_cache import SemanticCache
+from ..utils.resilience import CircuitBreaker, CircuitOpenError, call_with_retry
 
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 PROMPTS_DIR = PROJECT_ROOT / "prompts" / "grok"
-load_dotenv(PROJECT_ROOT / ".env")
 
+# Variables already set in the environment take precedence over .env
+load_dotenv(PROJECT_ROOT / ".env", override=False)
 
+# Read once at import; calls never touch os.environ
+XAI_API_KEY = os.getenv("XAI_API_KEY")
+GROK_MODEL = os.getenv("GROK_MODEL")
+GROK_API_URL = "https://api.x.ai/v1/chat/completions"
+GROK_TEMPERATURE = float(os.getenv("GROK_TEMPERATURE", "0.7"))
+GROK_SEMANTIC_CACHE = os.getenv("GROK_SEMANTIC_CACHE", "false").lower() == "true"
+
+# Responses below this temperature are close to deterministic, so a
+# near-identical question can safely reuse an earlier answer
+SEMANTIC_CACHE_MAX_TEMPERATURE = 0.5
+
+if GROK_SEMANTIC_CACHE and GROK_TEMPERATURE >= SEMANTIC_CACHE_MAX_TEMPERATURE:
+    logger.warning(
+        f"⚠️ GROK_SEMANTIC_CACHE is on but GROK_TEMPERATURE={GROK_TEMPERATURE} "
+        f"(cache needs < {SEMANTIC_CACHE_MAX_TEMPERATURE}); answers won't be cached"
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _response_cache() -> SemanticCache:
+    """Semantic cache for ask_grok_no_search (created on first use)"""
+    return SemanticCache()
+
+
+# Shared async client: pooled keep-alive connections to api.x.ai, with HTTP/2
+# so concurrent fact-check and search calls multiplex over one socket.
+# Retries are left to call_with_retry so they don't multiply.
+_ASYNC_CLIENT = httpx.AsyncClient(
+    headers={
+        "Authorization": f"Bearer {XAI_API_KEY}",
+        "Content-Type": "application/json"
+    },
+    timeout=60.0,
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
+)
+
+
+# Fail fast while api.x.ai is down instead of waiting out timeouts
+_BREAKER = CircuitBreaker("Grok")
+
+
+async def _send(payload: dict) -> httpx.Response:
+    """POST a payload to Grok, raising on an HTTP error status"""
+    response = await _ASYNC_CLIENT.post(GROK_API_URL, json=payload)
+    response.raise_for_status()
+    return response
+
+
+async def close() -> None:
+    """Close the shared Grok HTTP client (call on application shutdown)"""
+    await _ASYNC_CLIENT.aclose()
+
+
+@functools.lru_cache(maxsize=32)
 def _load_prompt(filename: str) -> str:
-    """Load prompt from file, return empty string if not found"""
+    """Load prompt from file (read once per process), return empty string if not found"""
     prompt_file = PROMPTS_DIR / filename
     if prompt_file.exists():
         with open(prompt_file, 'r', encoding='utf-8') as f:
@@ -32,7 +94,67 @@ def _load_prompt(filename: str) -> str:
         return ""
 
 
-def ask_grok(
+def _build_payload(system_prompt_file: str, question: str, model: str, temperature: float) -> dict:
+    """Build a chat-completions payload (system prompt from file + user question)"""
+    return {
+        "messages": [
+            {
+                "role": "system",
+                # Load system prompt from file (Rule #1: NO HARDCODED PROMPTS)
+                "content": _load_prompt(system_prompt_file)
+            },
+            {
+                "role": "user",
+                "content": question
+            }
+        ],
+        # Use model from parameter or environment
+        "model": model or GROK_MODEL,
+        "temperature": temperature
+    }
+
+
+async def _post_grok(payload: dict) -> str:
+    """
+    Send a chat-completions payload to Grok through the shared client
+
+    Returns:
+        Grok's response as string, or None if error
+    """
+    if not XAI_API_KEY:
+        logger.error("❌ XAI_API_KEY not set in environment")
+        return None
+
+    model_name = payload["model"]
+    if not model_name:
+        logger.error("❌ GROK_MODEL not set in environment")
+        return None
+
+    mode = "" if "search_parameters" in payload else "no search, "
+
+    try:
+        response = await _BREAKER.call(call_with_retry, _send, payload)
+
+        result = response.json()
+        answer = result["choices"][0]["message"]["content"]
+
+        logger.info(f"✅ Grok API call successful ({mode}model: {model_name})")
+        return answer
+
+    except CircuitOpenError as e:
+        logger.warning(f"⚠️ Grok API call skipped: {e}")
+        return None
+    except httpx.HTTPError as e:
+        logger.error(f"❌ Grok API call failed: {e}")
+        if isinstance(e, httpx.HTTPStatusError):
+            logger.error(f"Response: {e.response.text}")
+        return None
+    except (KeyError, IndexError, ValueError) as e:
+        logger.error(f"❌ Failed to parse Grok API response: {e}")
+        return None
+
+
+async def ask_grok(
     question: str,
     x_handles: list = None,
     model: str = None,
@@ -51,45 +173,16 @@ def ask_grok(
         Grok's response as string, or None if error
 
     Example:
-        >>> response = ask_grok("What are the latest AI trends?")
-        >>> response = ask_grok(
+        >>> response = await ask_grok("What are the latest AI trends?")
+        >>> response = await ask_grok(
         ...     "What's happening with VTubers?",
         ...     x_handles=["hololive", "nijisanji_world"]
         ... )
     """
-    api_key = os.getenv("XAI_API_KEY")
-    if not api_key:
-        logger.error("❌ XAI_API_KEY not set in environment")
-        return None
-
-    url = "https://api.x.ai/v1/chat/completions"
-
-    # Use model from parameter or environment
-    model_name = model or os.getenv("GROK_MODEL")
-    if not model_name:
-        logger.error("❌ GROK_MODEL not set in environment")
-        return None
-
-    # Load system prompt from file (Rule #1: NO HARDCODED PROMPTS)
-    system_prompt = _load_prompt("search_system_prompt.txt")
-
-    payload = {
-        "messages": [
-            {
-                "role": "system",
-                "content": system_prompt
-            },
-            {
-                "role": "user",
-                "content": question
-            }
-        ],
-        "model": model_name,
-        "temperature": temperature,
-        "search_parameters": {
-            "mode": "on",
-            "return_citations": True
-        }
+    payload = _build_payload("search_system_prompt.txt", question, model, temperature)
+    payload["search_parameters"] = {
+        "mode": "on",
+        "return_citations": True
     }
 
     # Filter by specific X handles if provided
@@ -101,88 +194,55 @@ def ask_grok(
     else:
         logger.info("🔍 X search: general mode")
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
-    try:
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
-
-        result = response.json()
-        answer = result["choices"][0]["message"]["content"]
+    return await _post_grok(payload)
 
-        logger.info(f"✅ Grok API call successful (model: {model_name})")
-        return answer
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Grok API call failed: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            logger.error(f"Response: {e.response.text}")
-        return None
-    except (KeyError, IndexError) as e:
-        logger.error(f"❌ Failed to parse Grok API response: {e}")
-        return None
-
-
-def ask_grok_no_search(question: str, model: str = None, temperature: float = 0.7) -> str:
+async def ask_grok_no_search(
+    question: str,
+    model: str = None,
+    temperature: float = None,
+    cache_text: Optional[str] = None,
+    cache_scope: str = ""
+) -> str:
     """
     Ask Grok without X search (for fact-checking, reasoning tasks)
 
+    With GROK_SEMANTIC_CACHE on, low-temperature answers for the default
+    model are served from a semantic cache when cache_text is nearly
+    identical to an earlier one in the same cache_scope. Only cache_text
+    is compared (not the templated question), so callers pass the part
+    that varies, e.g. the statement being fact-checked.
+
     Args:
         question: Question to ask
         model: Optional model name (defaults to env GROK_MODEL)
-        temperature: Response temperature (0.0-1.0)
+        temperature: Response temperature (0.0-1.0, defaults to env GROK_TEMPERATURE)
+        cache_text: Text the answer depends on; None disables caching
+        cache_scope: Exact-match scope for cache_text (e.g. the prompt template)
 
     Returns:
         Grok's response as string, or None if error
     """
-    api_key = os.getenv("XAI_API_KEY")
-    if not api_key:
-        logger.error("❌ XAI_API_KEY not set in environment")
-        return None
-
-    url = "https://api.x.ai/v1/chat/completions"
-    model_name = model or os.getenv("GROK_MODEL")
-    if not model_name:
-        logger.error("❌ GROK_MODEL not set in environment")
-        return None
-
-    # Load system prompt from file (Rule #1: NO HARDCODED PROMPTS)
-    system_prompt = _load_prompt("fact_check_system_prompt.txt")
-
-    payload = {
-        "messages": [
-            {
-                "role": "system",
-                "content": system_prompt
-            },
-            {
-                "role": "user",
-                "content": question
-            }
-        ],
-        "model": model_name,
-        "temperature": temperature
-        # No search_parameters - pure reasoning mode
-    }
+    if temperature is None:
+        temperature = GROK_TEMPERATURE
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
+    use_cache = (
+        GROK_SEMANTIC_CACHE
+        and cache_text is not None
+        and temperature < SEMANTIC_CACHE_MAX_TEMPERATURE
+        and (model is None or model == GROK_MODEL)
+    )
 
-    try:
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
+    if use_cache:
+        cached = await _response_cache().aget(cache_text, cache_scope)
+        if cached is not None:
+            return cached
 
-        result = response.json()
-        answer = result["choices"][0]["message"]["content"]
+    # No search_parameters - pure reasoning mode
+    payload = _build_payload("fact_check_system_prompt.txt", question, model, temperature)
+    answer = await _post_grok(payload)
 
-        logger.info(f"✅ Grok API call successful (no search, model: {model_name})")
-        return answer
+    if use_cache and answer is not None:
+        await _response_cache().aput(cache_text, answer, cache_scope)
 
-    except Exception as e:
-        logger.error(f"❌ Grok API call failed: {e}")
-        return None
+    return answer
@@ -1,8 +1,8 @@
 """LLM provider interfaces."""
 
-from .base import LLMProvider, Message
+from .base import LLMProvider, Message, MessageLike
 from .kimi_provider import KimiProvider
 from .openai_provider import OpenAIProvider
 from .factory import LLMFactory
 
-__all__ = ["LLMProvider", "Message", "KimiProvider", "OpenAIProvider", "LLMFactory"]
+__all__ = ["LLMProvider", "Message", "MessageLike", "KimiProvider", "OpenAIProvider", "LLMFactory"]
@@ -1,18 +1,58 @@
 """Base LLM provider interface."""
 
+import asyncio
+import hashlib
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Union, TYPE_CHECKING
+from ..utils.resilience import CircuitBreaker, call_with_retry
+
+if TYPE_CHECKING:
+    from ..utils.semantic_cache import SemanticCache
 
 
 class Message:
-    """Chat message structure."""
+    """Chat message structure (treat as immutable once created)."""
+
+    __slots__ = ("role", "content", "_dict")
 
     def __init__(self, role: str, content: str):
         self.role = role
         self.content = content
+        # Built once; providers send the same dict on every request
+        self._dict = {"role": role, "content": content}
 
     def to_dict(self) -> Dict[str, str]:
-        return {"role": self.role, "content": self.content}
+        return self._dict
+
+
+# Providers accept Message objects or plain {"role", "content"} dicts
+MessageLike = Union[Message, Dict[str, str]]
+
+
+def to_message_dicts(messages: List[MessageLike]) -> List[Dict[str, str]]:
+    """Return messages as API dicts, passing dict lists through untouched."""
+    if messages and isinstance(messages[0], dict):
+        return messages
+    return [msg.to_dict() for msg in messages]
+
+
+def _cache_key(
+    messages: List[MessageLike],
+    temperature: float,
+    max_tokens: Optional[int],
+) -> Tuple[str, str]:
+    """
+    Split a conversation into response-cache keys.
+
+    Returns:
+        (latest turn, compared by similarity; exact hash of everything
+        before it plus the sampling settings)
+    """
+    dicts = to_message_dicts(messages)
+    digest = hashlib.sha256(f"{temperature}\x1e{max_tokens}".encode())
+    for msg in dicts[:-1]:
+        digest.update(f"\x1e{msg['role']}\x1f{msg['content']}".encode())
+    return (dicts[-1]["content"] if dicts else ""), digest.hexdigest()
 
 
 class LLMProvider(ABC):
@@ -21,24 +61,116 @@ class LLMProvider(ABC):
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
+        # Opt-in semantic response cache (set by LLMFactory)
+        self.response_cache: Optional["SemanticCache"] = None
+        # Per-provider breaker: one provider's outage doesn't trip the others
+        self._breaker = CircuitBreaker(self.get_provider_name())
 
-    @abstractmethod
     async def generate(
         self,
-        messages: List[Message],
+        messages: List[MessageLike],
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
     ) -> str:
         """
         Generate a response from the LLM.
 
+        When a response cache is attached, a conversation with the exact same
+        system prompt and history whose latest turn is nearly identical to a
+        cached one returns the cached response without calling the API. Transient
+        network errors are retried with backoff, and repeated failures
+        open the provider's circuit breaker.
+
         Args:
-            messages: List of conversation messages
+            messages: List of conversation messages (Message objects or dicts)
             temperature: Sampling temperature (0.0-2.0)
             max_tokens: Maximum tokens to generate
 
         Returns:
             Generated text response
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open
+        """
+        if self.response_cache is None:
+            return await self._call_api(messages, temperature, max_tokens)
+
+        latest, context = _cache_key(messages, temperature, max_tokens)
+        cached = await self.response_cache.aget(latest, context)
+        if cached is not None:
+            return cached
+
+        response = await self._call_api(messages, temperature, max_tokens)
+        if response:
+            await self.response_cache.aput(latest, response, context)
+        return response
+
+    async def _call_api(
+        self,
+        messages: List[MessageLike],
+        temperature: float,
+        max_tokens: Optional[int],
+    ) -> str:
+        """Call _generate through the circuit breaker with retries."""
+        return await self._breaker.call(
+            call_with_retry, self._generate, messages, temperature, max_tokens
+        )
+
+    async def generate_many(
+        self,
+        conversations: List[List[MessageLike]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        max_concurrency: int = 8,
+    ) -> List[str]:
+        """
+        Generate responses for many conversations concurrently.
+
+        Args:
+            conversations: One message list per request
+            temperature: Sampling temperature (0.0-2.0)
+            max_tokens: Maximum tokens to generate
+            max_concurrency: Maximum requests in flight at once
+
+        Returns:
+            Generated responses in the same order as conversations
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _one(messages: List[MessageLike]) -> str:
+            async with sem:
+                return await self.generate(messages, temperature, max_tokens)
+
+        return await asyncio.gather(*[_one(m) for m in conversations])
+
+    async def _generate(
+        self,
+        messages: List[MessageLike],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """Call the provider API (see generate) by collecting the stream."""
+        return "".join([
+            chunk async for chunk in self.generate_stream(messages, temperature, max_tokens)
+        ])
+
+    @abstractmethod
+    def generate_stream(
+        self,
+        messages: List[MessageLike],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as content deltas.
+
+        Args:
+            messages: List of conversation messages
+            temperature: Sampling temperature (0.0-2.0)
+            max_tokens: Maximum tokens to generate
+
+        Yields:
+            Text chunks as they arrive
         """
         pass
 
@@ -46,3 +178,7 @@ class LLMProvider(ABC):
     def get_provider_name(self) -> str:
         """Return the provider name for logging."""
         pass
+
+    async def aclose(self) -> None:
+        """Release network resources held by the provider."""
+        pass
@@ -1,15 +1,21 @@
 """LLM provider factory."""
 
 import os
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from .base import LLMProvider
 from .kimi_provider import KimiProvider
 from .openai_provider import OpenAIProvider
+from ..utils.semantic_cache import SemanticCache
 
 
 class LLMFactory:
     """Factory for creating LLM providers."""
 
+    # Providers by (provider_type, model); shutdown closes their clients.
+    # Unbounded: there is one entry per configured model, so nothing is
+    # evicted while its client is still open
+    _providers: Dict[Tuple[str, Optional[str]], LLMProvider] = {}
+
     @staticmethod
     def create_provider(
         provider_type: Optional[str] = None,
@@ -18,6 +24,9 @@ class LLMFactory:
         """
         Create an LLM provider based on environment configuration.
 
+        Providers are cached per (provider_type, model), so repeated calls
+        reuse the same instance and its HTTP connection pool.
+
         Args:
             provider_type: Override provider type (kimi, openai)
             model: Override model name
@@ -31,30 +40,54 @@ class LLMFactory:
                 raise ValueError("PRIMARY_LLM not found in environment")
             provider_type = provider_type.lower()
 
-        if provider_type == "kimi":
-            api_key = os.getenv("KIMI_API_KEY")
-            if not api_key:
-                raise ValueError("KIMI_API_KEY not found in environment")
-
-            if model is None:
+        if model is None:
+            if provider_type == "kimi":
                 # Use KIMI_MODEL_CHAT for conversations, fallback to KIMI_MODEL
                 model = os.getenv("KIMI_MODEL_CHAT") or os.getenv("KIMI_MODEL")
                 if not model:
                     raise ValueError("KIMI_MODEL_CHAT or KIMI_MODEL not found in environment")
 
-            return KimiProvider(api_key=api_key, model=model)
+            elif provider_type == "openai":
+                model = os.getenv("OPENAI_MODEL")
+                if not model:
+                    raise ValueError("OPENAI_MODEL not found in environment")
+
+        key = (provider_type, model)
+        provider = LLMFactory._providers.get(key)
+        if provider is None:
+            provider = LLMFactory._providers[key] = LLMFactory._create(provider_type, model)
+        return provider
+
+    @staticmethod
+    def _create(provider_type: str, model: Optional[str]) -> LLMProvider:
+        """Construct a provider for a resolved (provider_type, model) pair."""
+        if provider_type == "kimi":
+            api_key = os.getenv("KIMI_API_KEY")
+            if not api_key:
+                raise ValueError("KIMI_API_KEY not found in environment")
+
+            provider = KimiProvider(api_key=api_key, model=model)
 
         elif provider_type == "openai":
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not found in environment")
 
-            if model is None:
-                model = os.getenv("OPENAI_MODEL")
-                if not model:
-                    raise ValueError("OPENAI_MODEL not found in environment")
-
-            return OpenAIProvider(api_key=api_key, model=model)
+            provider = OpenAIProvider(api_key=api_key, model=model)
 
         else:
             raise ValueError(f"Unknown provider type: {provider_type}")
+
+        # Opt-in: conversations repeat less reliably than fact-check queries
+        if os.getenv("SEMANTIC_RESPONSE_CACHE", "false").lower() == "true":
+            provider.response_cache = SemanticCache()
+
+        return provider
+
+    @staticmethod
+    async def aclose_all() -> None:
+        """Close every cached provider (call on application shutdown)."""
+        for provider in LLMFactory._providers.values():
+            await provider.aclose()
+
+        LLMFactory._providers.clear()
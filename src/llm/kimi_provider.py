@@ -1,8 +1,9 @@
 """Kimi (Moonshot AI) LLM provider."""
 
+import json
 import httpx
-from typing import List, Optional
-from .base import LLMProvider, Message
+from typing import AsyncIterator, List, Optional
+from .base import LLMProvider, MessageLike, to_message_dicts
 
 
 class KimiProvider(LLMProvider):
@@ -13,38 +14,57 @@ class KimiProvider(LLMProvider):
     def __init__(self, api_key: str, model: str):
         super().__init__(api_key, model)
 
-    async def generate(
+        # Long-lived client: keep-alive pool reused across calls, HTTP/2
+        # multiplexes concurrent generate() calls over one connection
+        self._client = httpx.AsyncClient(
+            base_url=self.API_BASE_URL,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            http2=True,
+        )
+
+    async def generate_stream(
         self,
-        messages: List[Message],
+        messages: List[MessageLike],
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
-    ) -> str:
-        """Generate response using Kimi API."""
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+    ) -> AsyncIterator[str]:
+        """Stream response deltas from Kimi API (server-sent events)."""
 
         payload = {
             "model": self.model,
-            "messages": [msg.to_dict() for msg in messages],
+            "messages": to_message_dicts(messages),
             "temperature": temperature,
+            "stream": True,
         }
 
         if max_tokens:
             payload["max_tokens"] = max_tokens
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.API_BASE_URL}/chat/completions",
-                headers=headers,
-                json=payload,
-            )
+        async with self._client.stream("POST", "/chat/completions", json=payload) as response:
             response.raise_for_status()
-            data = response.json()
 
-            return data["choices"][0]["message"]["content"]
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+
+                choices = json.loads(data).get("choices")
+                if choices:
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
 
     def get_provider_name(self) -> str:
         return f"Kimi ({self.model})"
@@ -1,8 +1,8 @@
 """OpenAI LLM provider (backup/fallback)."""
 
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from openai import AsyncOpenAI
-from .base import LLMProvider, Message
+from .base import LLMProvider, MessageLike, to_message_dicts
 
 
 class OpenAIProvider(LLMProvider):
@@ -12,22 +12,29 @@ class OpenAIProvider(LLMProvider):
         super().__init__(api_key, model)
         self.client = AsyncOpenAI(api_key=api_key)
 
-    async def generate(
+    async def generate_stream(
         self,
-        messages: List[Message],
+        messages: List[MessageLike],
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
-    ) -> str:
-        """Generate response using OpenAI API."""
+    ) -> AsyncIterator[str]:
+        """Stream response deltas from OpenAI API."""
 
-        response = await self.client.chat.completions.create(
+        stream = await self.client.chat.completions.create(
             model=self.model,
-            messages=[msg.to_dict() for msg in messages],
+            messages=to_message_dicts(messages),
             temperature=temperature,
             max_tokens=max_tokens,
+            stream=True,
         )
 
-        return response.choices[0].message.content
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def aclose(self) -> None:
+        """Close the underlying OpenAI client."""
+        await self.client.close()
 
     def get_provider_name(self) -> str:
         return f"OpenAI ({self.model})"
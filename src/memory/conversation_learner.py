@@ -16,6 +16,57 @@ from datetime import datetime
 from pathlib import Path
 import json
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is missing
+    orjson = None
+
+
+# Precompiled patterns for business-name detection/extraction
+_TRAILING_PUNCT_RE = re.compile(r'[,.!?;:。，！？；：]+$')
+_QUOTE_CHARS_RE = re.compile(r'[「」『』""'']')
+_CAPITALIZED_NAME_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b')
+_JAPANESE_BUSINESS_RE = re.compile(r'[\u3040-\u309F\u30A0-\u30FF]{2,}(?:店|カフェ|焙煎所|専門店)')
+# Every correction pattern needs a letter (Latin or CJK) and every business
+# name needs a letter or quote; messages with neither (emoji, digits,
+# punctuation, stickers) can't produce a result
+_FAST_PREFILTER = re.compile(r'[^\W\d_]|[「」『』"\']')
+
+# Business-name candidates in priority order: quoted text, Japanese
+# business name, capitalized English name
+_BUSINESS_NAME_RE = re.compile(
+    r'[「『"\'](?P<quoted>.+?)[」』"\']'
+    r'|'
+    r'(?P<japanese>[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]{2,}(?:店|カフェ|焙煎所|専門店|Bar|BAR))'
+    r'|'
+    r'\b(?P<english>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+(?:\s+(?:Cafe|Coffee|Restaurant|Shop|Bar))?)\b'
+)
+
+# Fact category keywords, one case-insensitive alternation per category
+_PLACE_KEYWORDS = ['cafe', 'restaurant', 'shop', 'store', 'bar', 'hotel',
+                   'カフェ', '店', 'レストラン', '焙煎所', '専門店']
+_MEDIA_KEYWORDS = ['book', 'novel', 'manga', 'anime', 'film', 'movie']
+_PERSON_KEYWORDS = ['sensei', 'master', 'teacher', 'professor', '先生', '師匠']
+
+_PLACE_KEYWORD_RE = re.compile("|".join(map(re.escape, _PLACE_KEYWORDS)), re.IGNORECASE)
+_MEDIA_KEYWORD_RE = re.compile("|".join(map(re.escape, _MEDIA_KEYWORDS)), re.IGNORECASE)
+_PERSON_KEYWORD_RE = re.compile("|".join(map(re.escape, _PERSON_KEYWORDS)), re.IGNORECASE)
+
+
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def _loads(data: bytes):
+    """Parse UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class CorrectionDetector:
     """Detect when users are providing corrections or factual information."""
@@ -47,6 +98,13 @@ class CorrectionDetector:
         r"(.+?)[\(（](.+?)[\)）]",  # "心斎橋焙煎所 (Shinsaibashi)"
     ]
 
+    # Compiled once at class creation
+    _COMPILED_CORRECTION = [re.compile(p, re.IGNORECASE) for p in CORRECTION_PATTERNS]
+
+    # All correction patterns fused into one alternation: a single scan tells
+    # whether any of them can match before the ordered per-pattern pass
+    _ANY_CORRECTION = re.compile("|".join(f"(?:{p})" for p in CORRECTION_PATTERNS), re.IGNORECASE)
+
     def detect_correction(self, message: str) -> Optional[Dict]:
         """
         Detect if message contains a correction or factual information.
@@ -64,11 +122,16 @@ class CorrectionDetector:
             }
             or None if no correction detected
         """
-        message_lower = message.lower()
-
-        # Check for correction patterns
-        for pattern in self.CORRECTION_PATTERNS:
-            match = re.search(pattern, message, re.IGNORECASE)
+        if len(message) < 2 or not _FAST_PREFILTER.search(message):
+            return None
+
+        # Check for correction patterns. The fused regex rejects the common
+        # no-correction message in one pass; on a hit the patterns are tried in
+        # priority order, since the alternation alone would return the leftmost
+        # match rather than the most specific pattern.
+        patterns = self._COMPILED_CORRECTION if self._ANY_CORRECTION.search(message) else ()
+        for pattern in patterns:
+            match = pattern.search(message)
             if match:
                 extracted = match.group(1).strip()
 
@@ -101,7 +164,7 @@ class CorrectionDetector:
     def _clean_extracted_text(self, text: str) -> str:
         """Clean extracted text."""
         # Remove trailing punctuation
-        text = re.sub(r'[,.!?;:。，！？；：]+$', '', text)
+        text = _TRAILING_PUNCT_RE.sub('', text)
 
         # Remove quotes
         text = text.strip('"\'「」『』""''')
@@ -110,22 +173,16 @@ class CorrectionDetector:
 
     def _categorize_fact(self, text: str) -> str:
         """Categorize the type of fact."""
-        text_lower = text.lower()
-
         # Check for place indicators
-        place_keywords = ['cafe', 'restaurant', 'shop', 'store', 'bar', 'hotel',
-                         'カフェ', '店', 'レストラン', '焙煎所', '専門店']
-        if any(kw in text_lower for kw in place_keywords):
+        if _PLACE_KEYWORD_RE.search(text):
             return "place"
 
         # Check for book/media indicators
-        media_keywords = ['book', 'novel', 'manga', 'anime', 'film', 'movie']
-        if any(kw in text_lower for kw in media_keywords):
+        if _MEDIA_KEYWORD_RE.search(text):
             return "media"
 
         # Check for person indicators
-        person_keywords = ['sensei', 'master', 'teacher', 'professor', '先生', '師匠']
-        if any(kw in text_lower for kw in person_keywords):
+        if _PERSON_KEYWORD_RE.search(text):
             return "person"
 
         return "general"
@@ -133,56 +190,68 @@ class CorrectionDetector:
     def _looks_like_business_name(self, text: str) -> bool:
         """Check if text looks like it contains a business name."""
         # Check for quotes around text (common when mentioning names)
-        if re.search(r'[「」『』""'']', text):
+        if _QUOTE_CHARS_RE.search(text):
             return True
 
         # Check for capital words (English names)
-        if re.search(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b', text):
+        if _CAPITALIZED_NAME_RE.search(text):
             return True
 
         # Check for Japanese business patterns
-        if re.search(r'[\u3040-\u309F\u30A0-\u30FF]{2,}(?:店|カフェ|焙煎所|専門店)', text):
+        if _JAPANESE_BUSINESS_RE.search(text):
             return True
 
         return False
 
     def _extract_business_name(self, text: str) -> Optional[str]:
         """Extract business name from text."""
-        # Try quoted text first
-        quoted = re.search(r'[「『"\'](.+?)[」』"\']', text)
-        if quoted:
-            return quoted.group(1).strip()
+        # One scan for all three patterns. Quoted text wins outright;
+        # otherwise the first Japanese name beats the first English one.
+        japanese = english = None
+        for match in _BUSINESS_NAME_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == "quoted":
+                return match.group("quoted").strip()
+            if kind == "japanese" and japanese is None:
+                japanese = match.group("japanese").strip()
+            elif kind == "english" and english is None:
+                english = match.group("english").strip()
 
-        # Try Japanese business pattern
-        japanese = re.search(r'([\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]{2,}(?:店|カフェ|焙煎所|専門店|Bar|BAR))', text)
-        if japanese:
-            return japanese.group(1).strip()
-
-        # Try capitalized English name pattern
-        english = re.search(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+(?:\s+(?:Cafe|Coffee|Restaurant|Shop|Bar))?)\b', text)
-        if english:
-            return english.group(1).strip()
-
-        return None
+        return japanese if japanese is not None else english
 
 
 class ConversationLearner:
     """Learn from conversations and build sisters' memory."""
 
+    # Rewrite the full snapshot after this many journaled changes
+    COMPACT_EVERY = 100
+
     def __init__(self, pending_facts_file: Optional[Path] = None):
         if pending_facts_file is None:
             project_root = Path(__file__).parent.parent.parent
             pending_facts_file = project_root / "prompts" / "pending_facts.json"
 
         self.pending_facts_file = pending_facts_file
+        # Append-only log of changes since the last snapshot
+        self.journal_file = pending_facts_file.with_suffix(".jsonl")
         self.detector = CorrectionDetector()
         self.pending_facts = self._load_pending_facts()
 
+        # Lowercased pending facts for O(1) duplicate checks
+        self._pending_fact_index = {f["fact"].lower() for f in self.pending_facts["pending"]}
+        self._ops_since_compaction = 0
+        # Sequence number of the last journaled change (the snapshot records
+        # the last one it contains)
+        self._seq = self.pending_facts.get("journal_seq", 0)
+
+        # Fold changes journaled by a previous process into the snapshot
+        if self._replay_journal():
+            self.compact()
+
     def _load_pending_facts(self) -> Dict:
         """Load pending facts awaiting verification."""
         if self.pending_facts_file.exists():
-            with open(self.pending_facts_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _loads(self.pending_facts_file.read_bytes())
         else:
             return {
                 "pending": [],
@@ -192,11 +261,106 @@ class ConversationLearner:
             }
 
     def _save_pending_facts(self) -> None:
-        """Save pending facts to file."""
+        """Atomically write the full pending facts snapshot."""
         self.pending_facts_file.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(self.pending_facts_file, 'w', encoding='utf-8') as f:
-            json.dump(self.pending_facts, f, ensure_ascii=False, indent=2)
+        tmp_file = self.pending_facts_file.with_suffix(".json.tmp")
+        tmp_file.write_bytes(_dumps(self.pending_facts, indent=True))
+        os.replace(tmp_file, self.pending_facts_file)
+
+    def compact(self) -> None:
+        """Write a full snapshot and truncate the journal."""
+        self.pending_facts["journal_seq"] = self._seq
+        self._save_pending_facts()
+        open(self.journal_file, 'w', encoding='utf-8').close()
+        self._ops_since_compaction = 0
+
+    def _replay_journal(self) -> int:
+        """
+        Apply journaled changes on top of the snapshot. Returns ops applied.
+
+        Changes the snapshot already contains (a crash between writing it
+        and truncating the journal) are skipped by sequence number.
+        """
+        if not self.journal_file.exists():
+            return 0
+
+        applied = 0
+        snapshot_seq = self._seq
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    op = _loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from a crash mid-append
+                    continue
+                seq = op.get("seq", 0)
+                if seq and seq <= snapshot_seq:
+                    continue
+                self._apply(op)
+                self._seq = max(self._seq, seq)
+                applied += 1
+
+        return applied
+
+    def _record(self, op: Dict) -> Optional[Dict]:
+        """Apply a change in memory and append it to the journal."""
+        changed = self._apply(op)
+        if changed is None:
+            return None
+
+        self._seq += 1
+        op["seq"] = self._seq
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_file, 'ab') as f:
+            f.write(_dumps(op) + b"\n")
+
+        self._ops_since_compaction += 1
+        if self._ops_since_compaction >= self.COMPACT_EVERY:
+            self.compact()
+
+        return changed
+
+    def _apply(self, op: Dict) -> Optional[Dict]:
+        """
+        Apply one change to the in-memory state.
+
+        Not idempotent: replaying an op the snapshot already contains can
+        re-add a fact that has since been verified or rejected, so
+        _replay_journal skips those ops by sequence number.
+
+        Returns:
+            The affected fact entry, or None if nothing changed
+        """
+        if op["op"] == "add":
+            entry = op["entry"]
+            if self._is_duplicate(entry):
+                return None
+            self.pending_facts["pending"].append(entry)
+            self._pending_fact_index.add(entry["fact"].lower())
+            self.pending_facts["last_updated"] = op["at"]
+            return entry
+
+        for i, pending_fact in enumerate(self.pending_facts["pending"]):
+            if pending_fact["fact"] == op["fact"]:
+                if op["op"] == "verify":
+                    pending_fact["status"] = "verified"
+                    pending_fact["verification"] = op["verification"]
+                    pending_fact["verified_at"] = op["at"]
+                    target = "verified"
+                else:
+                    pending_fact["status"] = "rejected"
+                    pending_fact["rejection_reason"] = op["reason"]
+                    pending_fact["rejected_at"] = op["at"]
+                    target = "rejected"
+
+                # Move to verified/rejected list
+                self.pending_facts[target].append(pending_fact)
+                self.pending_facts["pending"].pop(i)
+                self._pending_fact_index.discard(pending_fact["fact"].lower())
+                return pending_fact
+
+        return None
 
     def process_message(self, user_message: str, phone_number: str,
                        conversation_context: Optional[str] = None) -> Optional[Dict]:
@@ -229,12 +393,8 @@ class ConversationLearner:
                 "verification": None
             }
 
-            # Check if similar fact already exists
-            if not self._is_duplicate(fact_entry):
-                self.pending_facts["pending"].append(fact_entry)
-                self.pending_facts["last_updated"] = datetime.now().isoformat()
-                self._save_pending_facts()
-
+            # Duplicates of an existing pending fact are ignored
+            if self._record({"op": "add", "entry": fact_entry, "at": datetime.now().isoformat()}):
                 print(f"✅ Detected user correction: {result['extracted_fact']}")
                 return result
 
@@ -242,13 +402,7 @@ class ConversationLearner:
 
     def _is_duplicate(self, new_fact: Dict) -> bool:
         """Check if fact is duplicate of existing pending fact."""
-        new_text = new_fact["fact"].lower()
-
-        for existing in self.pending_facts["pending"]:
-            if existing["fact"].lower() == new_text:
-                return True
-
-        return False
+        return new_fact["fact"].lower() in self._pending_fact_index
 
     def get_pending_facts(self, category: Optional[str] = None,
                          min_confidence: float = 0.5) -> List[Dict]:
@@ -266,35 +420,17 @@ class ConversationLearner:
 
     def mark_verified(self, fact: str, verification_data: Dict) -> None:
         """Mark a pending fact as verified."""
-        for i, pending_fact in enumerate(self.pending_facts["pending"]):
-            if pending_fact["fact"] == fact:
-                pending_fact["status"] = "verified"
-                pending_fact["verification"] = verification_data
-                pending_fact["verified_at"] = datetime.now().isoformat()
-
-                # Move to verified list
-                self.pending_facts["verified"].append(pending_fact)
-                self.pending_facts["pending"].pop(i)
-
-                self._save_pending_facts()
-                print(f"✅ Marked as verified: {fact}")
-                break
+        op = {"op": "verify", "fact": fact, "verification": verification_data,
+              "at": datetime.now().isoformat()}
+        if self._record(op):
+            print(f"✅ Marked as verified: {fact}")
 
     def mark_rejected(self, fact: str, reason: str) -> None:
         """Mark a pending fact as rejected."""
-        for i, pending_fact in enumerate(self.pending_facts["pending"]):
-            if pending_fact["fact"] == fact:
-                pending_fact["status"] = "rejected"
-                pending_fact["rejection_reason"] = reason
-                pending_fact["rejected_at"] = datetime.now().isoformat()
-
-                # Move to rejected list
-                self.pending_facts["rejected"].append(pending_fact)
-                self.pending_facts["pending"].pop(i)
-
-                self._save_pending_facts()
-                print(f"❌ Marked as rejected: {fact} (reason: {reason})")
-                break
+        op = {"op": "reject", "fact": fact, "reason": reason,
+              "at": datetime.now().isoformat()}
+        if self._record(op):
+            print(f"❌ Marked as rejected: {fact} (reason: {reason})")
 
     def get_stats(self) -> Dict:
         """Get statistics about learned facts."""
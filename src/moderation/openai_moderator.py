@@ -1,8 +1,14 @@
 """OpenAI Moderation API integration (Layer 2)."""
 
 import os
-from typing import Dict, Optional
+import json
+import asyncio
+import logging
+from typing import Dict, List, Optional
 from openai import AsyncOpenAI
+from openai.types import Moderation
+
+logger = logging.getLogger(__name__)
 
 
 class ModerationResult:
@@ -19,6 +25,14 @@ class ModerationResult:
         self.categories = categories
         self.category_scores = category_scores
         self.blocked_reason = blocked_reason
+        self._flagged_set = frozenset(cat for cat, flagged in categories.items() if flagged)
+
+        # Highest-scoring flagged category, computed once
+        self._primary_violation = max(
+            (cat for cat in category_scores if categories.get(cat, False)),
+            key=category_scores.__getitem__,
+            default=None
+        ) if is_flagged else None
 
     def should_block(self) -> bool:
         """Determine if content should be blocked."""
@@ -26,32 +40,21 @@ class ModerationResult:
 
     def get_primary_violation(self) -> Optional[str]:
         """Get the primary violation category."""
-        if not self.is_flagged:
-            return None
-
-        # Find the category with highest score
-        flagged_categories = {
-            cat: score
-            for cat, score in self.category_scores.items()
-            if self.categories.get(cat, False)
-        }
-
-        if not flagged_categories:
-            return None
-
-        return max(flagged_categories.items(), key=lambda x: x[1])[0]
+        return self._primary_violation
 
 
 class OpenAIModerator:
     """OpenAI Moderation API wrapper."""
 
-    # Critical categories that always block
-    CRITICAL_CATEGORIES = [
+    # Critical categories that always block, most severe first
+    _CRITICAL_ORDER = (
         "sexual/minors",
         "hate/threatening",
         "violence/graphic",
         "self-harm/intent"
-    ]
+    )
+    # Same categories as a set, for membership tests
+    CRITICAL_CATEGORIES = frozenset(_CRITICAL_ORDER)
 
     # High-risk categories (configurable threshold)
     HIGH_RISK_CATEGORIES = [
@@ -89,43 +92,137 @@ class OpenAIModerator:
             ModerationResult with flagging details
         """
         response = await self.client.moderations.create(input=text)
-        result = response.results[0]
+        return self._build_result(response.results[0])
 
+    def _build_result(self, result: Moderation) -> ModerationResult:
+        """Convert one API moderation result into a ModerationResult."""
         # Extract categories and scores
         categories = result.categories.model_dump()
         category_scores = result.category_scores.model_dump()
 
-        is_flagged = result.flagged
+        moderation = ModerationResult(
+            is_flagged=result.flagged,
+            categories=categories,
+            category_scores=category_scores
+        )
 
         # Determine blocking reason
-        blocked_reason = None
-        if is_flagged:
-            # Check critical categories first
-            for cat in self.CRITICAL_CATEGORIES:
-                if categories.get(cat, False):
-                    blocked_reason = f"Critical violation: {cat}"
-                    break
-
-            # If no critical, find highest scoring category
-            if not blocked_reason:
-                primary_violation = max(
-                    ((cat, score) for cat, score in category_scores.items() if categories.get(cat, False)),
-                    key=lambda x: x[1],
-                    default=(None, 0)
-                )
-                if primary_violation[0]:
-                    blocked_reason = f"Policy violation: {primary_violation[0]}"
-
-        return ModerationResult(
-            is_flagged=is_flagged,
-            categories=categories,
-            category_scores=category_scores,
-            blocked_reason=blocked_reason
+        if moderation.is_flagged:
+            # Check critical categories first, reporting the most severe
+            if self.is_critical_violation(moderation):
+                cat = next(c for c in self._CRITICAL_ORDER if c in moderation._flagged_set)
+                moderation.blocked_reason = f"Critical violation: {cat}"
+
+            # If no critical, use highest scoring category
+            if not moderation.blocked_reason and moderation._primary_violation:
+                moderation.blocked_reason = f"Policy violation: {moderation._primary_violation}"
+
+        return moderation
+
+    async def moderate_many(
+        self,
+        texts: List[str],
+        max_concurrency: int = 8,
+        mode: str = "realtime"
+    ) -> List[ModerationResult]:
+        """
+        Moderate many texts (for backfills and bulk imports).
+
+        Args:
+            texts: Contents to moderate
+            max_concurrency: Maximum requests in flight at once (realtime mode)
+            mode: "realtime" for concurrent API calls, "batch" for the
+                Batch API (cheaper, but may take up to 24h)
+
+        Returns:
+            ModerationResults in the same order as texts
+        """
+        if mode == "batch":
+            return await self.moderate_batch(texts)
+
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _one(text: str) -> ModerationResult:
+            async with sem:
+                return await self.moderate(text)
+
+        return await asyncio.gather(*[_one(t) for t in texts])
+
+    async def moderate_batch(
+        self,
+        texts: List[str],
+        poll_interval: float = 60.0
+    ) -> List[ModerationResult]:
+        """
+        Moderate texts through the OpenAI Batch API (non-interactive workloads only).
+
+        Inputs that fail inside the batch are retried with moderate().
+
+        Args:
+            texts: Contents to moderate
+            poll_interval: Seconds between batch status checks
+
+        Returns:
+            ModerationResults in the same order as texts
+
+        Raises:
+            RuntimeError: If the batch fails, expires or is cancelled
+        """
+        if not texts:
+            return []
+
+        lines = [
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/moderations",
+                "body": {"input": text}
+            }, ensure_ascii=False)
+            for i, text in enumerate(texts)
+        ]
+        input_file = await self.client.files.create(
+            file=("moderation_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/moderations",
+            completion_window="24h"
         )
+        logger.info(f"📦 Moderation batch {batch.id} submitted ({len(texts)} texts)")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Moderation batch {batch.id} ended with status: {batch.status}")
+
+        results: List[Optional[ModerationResult]] = [None] * len(texts)
+
+        if batch.output_file_id:
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                api_result = Moderation.model_validate(response["body"]["results"][0])
+                results[int(entry["custom_id"])] = self._build_result(api_result)
+
+        # Fall back to realtime moderation for anything the batch didn't return
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            logger.warning(f"⚠️ Moderation batch {batch.id}: {len(missing)} inputs failed, retrying realtime")
+            retried = await self.moderate_many([texts[i] for i in missing])
+            for i, result in zip(missing, retried):
+                results[i] = result
+
+        return results
 
     def is_critical_violation(self, result: ModerationResult) -> bool:
         """Check if result contains critical violations."""
-        return any(
-            result.categories.get(cat, False)
-            for cat in self.CRITICAL_CATEGORIES
-        )
+        return not result._flagged_set.isdisjoint(self.CRITICAL_CATEGORIES)
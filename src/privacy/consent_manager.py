@@ -7,18 +7,78 @@ Supports GDPR, CCPA, Taiwan PDPA, China PIPL requirements.
 import os
 import json
 import logging
-from datetime import datetime
+import threading
+from contextlib import contextmanager
 from typing import Optional, Dict, List
 from enum import Enum
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection as PGConnection
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from cachetools import TTLCache
 
-from .policy_messages import PrivacyPolicyMessages, Region
+from .policy_messages import PrivacyPolicyMessages
 from .encryption import ConversationEncryption
 
 logger = logging.getLogger(__name__)
 
+class _ConsentConnection(PGConnection):
+    """Connection that remembers whether the hot statements are prepared."""
+    prepared = False
+
+
+# Shared by every ConsentManager; created on first use
+_POOL: Optional[ThreadedConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool(connection_params: Dict) -> ThreadedConnectionPool:
+    """Return the process-wide connection pool, creating it once."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadedConnectionPool(
+                    minconn=2,
+                    maxconn=int(os.getenv("POSTGRES_POOL_MAX", "20")),
+                    connect_timeout=10,
+                    connection_factory=_ConsentConnection,
+                    **connection_params
+                )
+    return _POOL
+
+
+# Consent status per phone hash (None = no record), shared by every
+# ConsentManager. Status changes made here update it; anything else is
+# picked up within the TTL.
+_STATUS_CACHE = TTLCache(maxsize=10_000, ttl=60)
+_STATUS_CACHE_LOCK = threading.Lock()
+_MISS = object()
+
+# Latest message (ch.last_message) of the user_consents row uc: newest
+# hashed row and newest legacy plain-number row, one index probe each
+_LAST_MESSAGE_JOIN = """
+    LEFT JOIN LATERAL (
+        SELECT max(timestamp) AS last_message
+        FROM (
+            (
+                SELECT timestamp FROM conversation_history
+                WHERE phone_hash = uc.phone_hash AND timestamp IS NOT NULL
+                ORDER BY timestamp DESC
+                LIMIT 1
+            )
+            UNION ALL
+            (
+                SELECT timestamp FROM conversation_history
+                WHERE phone_hash IS NULL AND phone_number = uc.phone_number
+                  AND timestamp IS NOT NULL
+                ORDER BY timestamp DESC
+                LIMIT 1
+            )
+        ) latest
+    ) ch ON true
+"""
+
 
 class ConsentStatus(Enum):
     """User consent status."""
@@ -28,9 +88,19 @@ class ConsentStatus(Enum):
     WITHDRAWN = "withdrawn"   # User withdrew consent (deleted data)
 
 
+# Plain status strings for the per-message checks (skips Enum attribute lookups)
+_PENDING = ConsentStatus.PENDING.value
+_GRANTED = ConsentStatus.GRANTED.value
+_DECLINED = ConsentStatus.DECLINED.value
+_WITHDRAWN = ConsentStatus.WITHDRAWN.value
+
+
 class ConsentManager:
     """Manage user consent for data processing."""
 
+    # Statuses that mean the user has answered the consent request
+    _ANSWERED_STATUSES = frozenset({_GRANTED, _WITHDRAWN})
+
     def __init__(self):
         self.connection_params = {
             "host": os.getenv("POSTGRES_HOST", "localhost"),
@@ -41,246 +111,457 @@ class ConsentManager:
         }
         self.encryption = ConversationEncryption()
 
-    def _get_connection(self):
-        """Get database connection."""
-        return psycopg2.connect(**self.connection_params, connect_timeout=10)
+    # Server-side prepared statements for the per-message queries, created
+    # once per pooled connection so PostgreSQL parses and plans them once
+    _PREPARED_STATEMENTS = """
+        PREPARE consent_get(text, text, text) AS
+            WITH found AS (
+                SELECT * FROM user_consents WHERE phone_hash = $1
+                UNION ALL
+                SELECT * FROM user_consents WHERE phone_hash IS NULL AND phone_number = $2
+                LIMIT 1
+            ), migrated AS (
+                UPDATE user_consents SET phone_hash = $1, phone_number = $3
+                WHERE id IN (SELECT id FROM found WHERE phone_hash IS NULL)
+                RETURNING 1
+            )
+            SELECT found.*, EXISTS(SELECT 1 FROM migrated) AS _migrated FROM found;
+        PREPARE consent_status(text, text) AS
+            SELECT status FROM user_consents WHERE phone_hash = $1
+            UNION ALL
+            SELECT status FROM user_consents WHERE phone_hash IS NULL AND phone_number = $2
+            LIMIT 1;
+        PREPARE consent_create(text, text, text, text, text, text) AS
+            INSERT INTO user_consents (
+                phone_hash, phone_number, region, status, language, policy_url_shown
+            )
+            VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (phone_hash) DO UPDATE SET
+                last_reminded_at = CURRENT_TIMESTAMP
+            -- Only pending users are being reminded; leave other rows unwritten
+            WHERE user_consents.status = 'pending'
+            RETURNING *;
+        PREPARE consent_set_status(text, text, text) AS
+            UPDATE user_consents
+            SET status = $1,
+                consent_given_at = CASE WHEN $1 = 'granted'
+                    THEN CURRENT_TIMESTAMP ELSE consent_given_at END,
+                consent_method = CASE WHEN $1 = 'granted'
+                    THEN 'whatsapp_message' ELSE consent_method END,
+                consent_withdrawn_at = CASE WHEN $1 IN ('declined', 'withdrawn')
+                    THEN CURRENT_TIMESTAMP ELSE consent_withdrawn_at END,
+                data_deletion_requested_at = CASE WHEN $1 = 'withdrawn'
+                    THEN CURRENT_TIMESTAMP ELSE data_deletion_requested_at END
+            WHERE phone_hash = $2 OR (phone_number = $3 AND phone_hash IS NULL)
+            RETURNING id;
+        PREPARE consent_record_deletion(text, text) AS
+            UPDATE user_consents
+            SET data_deleted_at = CURRENT_TIMESTAMP,
+                metadata = jsonb_set(COALESCE(metadata, '{}'::jsonb), '{deletion_completed}', 'true'::jsonb, true)
+            WHERE phone_hash = $1 OR (phone_number = $2 AND phone_hash IS NULL)
+            RETURNING id;
+        PREPARE consent_record_export(text, text) AS
+            UPDATE user_consents
+            SET data_export_requested_at = CURRENT_TIMESTAMP
+            WHERE phone_hash = $1 OR (phone_number = $2 AND phone_hash IS NULL)
+            RETURNING id;
+    """
+
+    @contextmanager
+    def _connection(self, prepare: bool = True):
+        """
+        Borrow a pooled connection; commit on success, roll back on error.
+
+        Args:
+            prepare: Make sure the hot statements are prepared on this
+                connection (False for schema setup, before the table exists)
+        """
+        pool = _get_pool(self.connection_params)
+        conn = pool.getconn()
+        try:
+            if prepare and not conn.prepared:
+                with conn.cursor() as cursor:
+                    cursor.execute(self._PREPARED_STATEMENTS)
+                conn.commit()
+                conn.prepared = True
+
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            # Drop connections the server closed so the pool reconnects
+            pool.putconn(conn, close=bool(conn.closed))
+
+    # Schema objects ensure_table_exists is responsible for
+    _SCHEMA_PROBE = """
+        SELECT
+            -- Legacy table the phone_hash migration hasn't run on
+            to_regclass('user_consents') IS NOT NULL
+                AND NOT EXISTS (SELECT 1 FROM information_schema.columns
+                                WHERE table_name = 'user_consents' AND column_name = 'phone_hash')
+                AS needs_migration,
+            to_regclass('user_consents') IS NOT NULL
+                AND to_regclass('idx_consents_phone_hash') IS NOT NULL
+                AND to_regclass('idx_consents_status') IS NOT NULL
+                AND to_regclass('idx_consents_region') IS NOT NULL
+                AND to_regclass('idx_consents_retention') IS NOT NULL
+                AS ready
+    """
+
+    _SCHEMA_DDL = """
+        CREATE TABLE IF NOT EXISTS user_consents (
+            id SERIAL PRIMARY KEY,
+            phone_hash VARCHAR(64) UNIQUE,
+            phone_number VARCHAR(255) NOT NULL,
+            region VARCHAR(20) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            language VARCHAR(10) DEFAULT 'en',
+            consent_version VARCHAR(20) DEFAULT '1.0',
+            ip_country VARCHAR(50),
+
+            -- Timestamps for audit trail
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            consent_given_at TIMESTAMP,
+            consent_withdrawn_at TIMESTAMP,
+            last_reminded_at TIMESTAMP,
+
+            -- Audit fields
+            consent_method VARCHAR(50) DEFAULT 'whatsapp_message',
+            policy_url_shown TEXT,
+
+            -- Data processing records
+            data_deletion_requested_at TIMESTAMP,
+            data_deleted_at TIMESTAMP,
+            data_export_requested_at TIMESTAMP,
+
+            -- Metadata
+            metadata JSONB DEFAULT '{}'
+        );
+
+        -- Create indexes
+        CREATE INDEX IF NOT EXISTS idx_consents_phone_hash ON user_consents(phone_hash);
+        CREATE INDEX IF NOT EXISTS idx_consents_status ON user_consents(status);
+        CREATE INDEX IF NOT EXISTS idx_consents_region ON user_consents(region);
+
+        -- Retention scan: only granted users whose data still exists
+        CREATE INDEX IF NOT EXISTS idx_consents_retention ON user_consents(status, data_deleted_at)
+            WHERE status = 'granted' AND data_deleted_at IS NULL;
+
+        -- Last-message lookup per user (table is owned by the session module)
+        DO $$
+        BEGIN
+            IF to_regclass('conversation_history') IS NOT NULL THEN
+                CREATE INDEX IF NOT EXISTS idx_conv_phone_ts
+                    ON conversation_history(phone_number, timestamp DESC);
+                CREATE INDEX IF NOT EXISTS idx_conv_hash_ts
+                    ON conversation_history(phone_hash, timestamp DESC);
+            END IF;
+        END $$;
+    """
 
     def ensure_table_exists(self):
-        """Create user_consents table if not exists."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_consents (
-                id SERIAL PRIMARY KEY,
-                phone_hash VARCHAR(64) UNIQUE,
-                phone_number VARCHAR(255) NOT NULL,
-                region VARCHAR(20) NOT NULL,
-                status VARCHAR(20) NOT NULL DEFAULT 'pending',
-                language VARCHAR(10) DEFAULT 'en',
-                consent_version VARCHAR(20) DEFAULT '1.0',
-                ip_country VARCHAR(50),
-
-                -- Timestamps for audit trail
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                consent_given_at TIMESTAMP,
-                consent_withdrawn_at TIMESTAMP,
-                last_reminded_at TIMESTAMP,
-
-                -- Audit fields
-                consent_method VARCHAR(50) DEFAULT 'whatsapp_message',
-                policy_url_shown TEXT,
-
-                -- Data processing records
-                data_deletion_requested_at TIMESTAMP,
-                data_deleted_at TIMESTAMP,
-                data_export_requested_at TIMESTAMP,
-
-                -- Metadata
-                metadata JSONB DEFAULT '{}'
-            )
-        """)
-
-        # Add phone_hash column if not exists (migration)
-        cursor.execute("""
-            DO $$
-            BEGIN
-                IF NOT EXISTS (SELECT 1 FROM information_schema.columns
-                               WHERE table_name = 'user_consents' AND column_name = 'phone_hash') THEN
-                    ALTER TABLE user_consents ADD COLUMN phone_hash VARCHAR(64);
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_consents_phone_hash ON user_consents(phone_hash);
-                END IF;
-            END $$;
-        """)
-
-        # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_consents_phone_hash ON user_consents(phone_hash)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_consents_status ON user_consents(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_consents_region ON user_consents(region)")
-
-        conn.commit()
-        conn.close()
+        """
+        Create user_consents table if not exists.
+
+        Raises:
+            RuntimeError: If the table predates phone_hash (run
+                migrations/0001_add_consent_phone_hash.sql first)
+        """
+        with self._connection(prepare=False) as conn, conn.cursor() as cursor:
+            # Cheap read-only probe; DDL only runs when something is missing
+            cursor.execute(self._SCHEMA_PROBE)
+            needs_migration, ready = cursor.fetchone()
+            if needs_migration:
+                raise RuntimeError(
+                    "user_consents has no phone_hash column; "
+                    "run migrations/0001_add_consent_phone_hash.sql"
+                )
+            if ready:
+                logger.info("user_consents table ready")
+                return
+
+            # All DDL in one round trip
+            cursor.execute(self._SCHEMA_DDL)
+
         logger.info("user_consents table ready")
 
     def get_user_consent(self, phone_number: str) -> Optional[Dict]:
         """Get user's consent record."""
         phone_hash = self.encryption.hash_phone_number(phone_number)
 
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        # First try by hash (new encrypted records)
-        cursor.execute("""
-            SELECT * FROM user_consents WHERE phone_hash = %s
-        """, (phone_hash,))
-        result = cursor.fetchone()
+        # Only used if a legacy record has to be migrated, but encrypting up
+        # front lets lookup + migration run as one statement
+        encrypted_phone = self.encryption.encrypt(phone_number)
 
-        # Fallback: try by plain phone number (legacy records)
-        if not result:
-            cursor.execute("""
-                SELECT * FROM user_consents WHERE phone_number = %s AND phone_hash IS NULL
-            """, (phone_number,))
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            # Look up by hash (new encrypted records), falling back to plain
+            # phone number (legacy records), which are migrated in place
+            cursor.execute(
+                "EXECUTE consent_get(%s, %s, %s)",
+                (phone_hash, phone_number, encrypted_phone)
+            )
             result = cursor.fetchone()
 
-            # Migrate legacy record if found
-            if result:
-                encrypted_phone = self.encryption.encrypt(phone_number)
-                cursor.execute("""
-                    UPDATE user_consents SET phone_hash = %s, phone_number = %s WHERE id = %s
-                """, (phone_hash, encrypted_phone, result['id']))
-                conn.commit()
-                logger.info(f"Migrated legacy consent for phone hash {phone_hash[:8]}...")
+        self._cache_status(phone_hash, result["status"] if result else None)
 
-        conn.close()
-        return dict(result) if result else None
+        if not result:
+            return None
+
+        result = dict(result)
+        if result.pop("_migrated"):
+            logger.info(f"Migrated legacy consent for phone hash {phone_hash[:8]}...")
+        return result
 
     def create_pending_consent(self, phone_number: str, language: str = "en") -> Dict:
         """Create a pending consent record for new user."""
-        region = PrivacyPolicyMessages.detect_region(phone_number)
-        policy_url = PrivacyPolicyMessages.POLICY_URLS.get(region, PrivacyPolicyMessages.POLICY_URLS[Region.DEFAULT])
+        region, policy_url = PrivacyPolicyMessages.get_region_and_policy_url(phone_number)
 
         phone_hash = self.encryption.hash_phone_number(phone_number)
         encrypted_phone = self.encryption.encrypt(phone_number)
 
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            # created_at comes from the column default
+            cursor.execute("EXECUTE consent_create(%s, %s, %s, %s, %s, %s)", (
+                phone_hash,
+                encrypted_phone,
+                region.value,
+                _PENDING,
+                language,
+                policy_url
+            ))
 
-        cursor.execute("""
-            INSERT INTO user_consents (
-                phone_hash, phone_number, region, status, language, policy_url_shown, created_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (phone_hash) DO UPDATE SET
-                last_reminded_at = CURRENT_TIMESTAMP
-            RETURNING *
-        """, (
-            phone_hash,
-            encrypted_phone,
-            region.value,
-            ConsentStatus.PENDING.value,
-            language,
-            policy_url,
-            datetime.now()
-        ))
-
-        result = cursor.fetchone()
-        conn.commit()
-        conn.close()
-
-        logger.info(f"Created pending consent for {phone_hash[:8]}... (region: {region.value})")
+            result = cursor.fetchone()
+            created = result is not None
+
+            if not created:
+                # Existing non-pending record, left untouched by the upsert
+                cursor.execute("SELECT * FROM user_consents WHERE phone_hash = %s", (phone_hash,))
+                result = cursor.fetchone()
+
+        self._cache_status(phone_hash, result["status"])
+
+        if created:
+            logger.info(f"Created pending consent for {phone_hash[:8]}... (region: {region.value})")
         return dict(result)
 
-    def grant_consent(self, phone_number: str) -> bool:
-        """Record user's consent."""
-        phone_hash = self.encryption.hash_phone_number(phone_number)
+    def create_granted_consent(self, phone_number: str, language: str = "en") -> bool:
+        """
+        Register a new user with implicit consent.
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        Same as create_pending_consent followed by grant_consent, but both
+        statements go to the server in one round trip.
 
-        # Try by hash first, then fallback to plain phone number
-        cursor.execute("""
-            UPDATE user_consents
-            SET status = %s,
-                consent_given_at = CURRENT_TIMESTAMP,
-                consent_method = 'whatsapp_message'
-            WHERE phone_hash = %s OR (phone_number = %s AND phone_hash IS NULL)
-            RETURNING id
-        """, (ConsentStatus.GRANTED.value, phone_hash, phone_number))
+        Args:
+            phone_number: User's phone number
+            language: Detected language of the user
+
+        Returns:
+            True if the record is now granted
+        """
+        region, policy_url = PrivacyPolicyMessages.get_region_and_policy_url(phone_number)
+
+        phone_hash = self.encryption.hash_phone_number(phone_number)
+        encrypted_phone = self.encryption.encrypt(phone_number)
+
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                "EXECUTE consent_create(%s, %s, %s, %s, %s, %s);"
+                "EXECUTE consent_set_status(%s, %s, %s);",
+                (
+                    phone_hash, encrypted_phone, region.value, _PENDING, language, policy_url,
+                    _GRANTED, phone_hash, phone_number
+                )
+            )
 
-        result = cursor.fetchone()
-        conn.commit()
-        conn.close()
+            # Only the last statement's result comes back
+            result = cursor.fetchone()
 
         if result:
-            logger.info(f"Consent granted for {phone_hash[:8]}...")
+            self._cache_status(phone_hash, _GRANTED)
+            logger.info(f"Created granted consent for {phone_hash[:8]}... (region: {region.value})")
             return True
         return False
 
-    def decline_consent(self, phone_number: str) -> bool:
-        """Record user's decline."""
-        phone_hash = self.encryption.hash_phone_number(phone_number)
+    def bulk_create_pending(self, phone_numbers: List[str], language: str = "en") -> int:
+        """
+        Create pending consent records for many users at once (imports/migrations).
+
+        Users that already have a record are left untouched.
+
+        Args:
+            phone_numbers: Phone numbers to register
+            language: Language for every new record
+
+        Returns:
+            Number of records created
+        """
+        rows = {}
+        for phone_number in phone_numbers:
+            phone_hash = self.encryption.hash_phone_number(phone_number)
+            if phone_hash in rows:
+                continue
+            region, policy_url = PrivacyPolicyMessages.get_region_and_policy_url(phone_number)
+            rows[phone_hash] = (
+                phone_hash,
+                self.encryption.encrypt(phone_number),
+                region.value,
+                _PENDING,
+                language,
+                policy_url
+            )
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        if not rows:
+            return 0
 
-        cursor.execute("""
-            UPDATE user_consents
-            SET status = %s,
-                consent_withdrawn_at = CURRENT_TIMESTAMP
-            WHERE phone_hash = %s OR (phone_number = %s AND phone_hash IS NULL)
-            RETURNING id
-        """, (ConsentStatus.DECLINED.value, phone_hash, phone_number))
+        with self._connection() as conn, conn.cursor() as cursor:
+            created = execute_values(cursor, """
+                INSERT INTO user_consents (
+                    phone_hash, phone_number, region, status, language, policy_url_shown
+                )
+                VALUES %s
+                ON CONFLICT (phone_hash) DO NOTHING
+                RETURNING id
+            """, list(rows.values()), page_size=1000, fetch=True)
+
+        with _STATUS_CACHE_LOCK:
+            for phone_hash in rows:
+                _STATUS_CACHE.pop(phone_hash, None)
 
-        result = cursor.fetchone()
-        conn.commit()
-        conn.close()
+        logger.info(f"Bulk created {len(created)} pending consents ({len(rows)} requested)")
+        return len(created)
+
+    def _set_status(self, phone_number: str, status: ConsentStatus) -> bool:
+        """Move the user's consent record to status, stamping the matching timestamps."""
+        phone_hash = self.encryption.hash_phone_number(phone_number)
+
+        with self._connection() as conn, conn.cursor() as cursor:
+            # Try by hash first, then fallback to plain phone number
+            cursor.execute(
+                "EXECUTE consent_set_status(%s, %s, %s)",
+                (status.value, phone_hash, phone_number)
+            )
+
+            result = cursor.fetchone()
 
         if result:
-            logger.info(f"Consent declined for {phone_hash[:8]}...")
+            self._cache_status(phone_hash, status.value)
+            logger.info(f"Consent {status.value} for {phone_hash[:8]}...")
             return True
         return False
 
+    def grant_consent(self, phone_number: str) -> bool:
+        """Record user's consent."""
+        return self._set_status(phone_number, ConsentStatus.GRANTED)
+
+    def decline_consent(self, phone_number: str) -> bool:
+        """Record user's decline."""
+        return self._set_status(phone_number, ConsentStatus.DECLINED)
+
     def withdraw_consent(self, phone_number: str) -> bool:
         """Record consent withdrawal (for data deletion)."""
-        phone_hash = self.encryption.hash_phone_number(phone_number)
+        return self._set_status(phone_number, ConsentStatus.WITHDRAWN)
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+    def _cache_status(self, phone_hash: str, status: Optional[str]) -> None:
+        with _STATUS_CACHE_LOCK:
+            _STATUS_CACHE[phone_hash] = status
 
-        cursor.execute("""
-            UPDATE user_consents
-            SET status = %s,
-                consent_withdrawn_at = CURRENT_TIMESTAMP,
-                data_deletion_requested_at = CURRENT_TIMESTAMP
-            WHERE phone_hash = %s OR (phone_number = %s AND phone_hash IS NULL)
-            RETURNING id
-        """, (ConsentStatus.WITHDRAWN.value, phone_hash, phone_number))
+    def invalidate_cached_status(self, phone_number: str) -> None:
+        """Drop the cached consent status (after changing user_consents elsewhere)."""
+        with _STATUS_CACHE_LOCK:
+            _STATUS_CACHE.pop(self.encryption.hash_phone_number(phone_number), None)
 
-        result = cursor.fetchone()
-        conn.commit()
-        conn.close()
+    def invalidate_cached_hash(self, phone_hash: str) -> None:
+        """Drop the cached consent status by phone hash (when only the hash is known)."""
+        with _STATUS_CACHE_LOCK:
+            _STATUS_CACHE.pop(phone_hash, None)
 
-        if result:
-            logger.info(f"Consent withdrawn for {phone_hash[:8]}...")
-            return True
-        return False
+    def _get_status(self, phone_number: str) -> Optional[str]:
+        """Get the user's consent status (None if no record), cached for a short TTL."""
+        phone_hash = self.encryption.hash_phone_number(phone_number)
 
-    def has_valid_consent(self, phone_number: str) -> bool:
-        """Check if user has valid consent."""
-        consent = self.get_user_consent(phone_number)
+        with _STATUS_CACHE_LOCK:
+            status = _STATUS_CACHE.get(phone_hash, _MISS)
+        if status is not _MISS:
+            return status
 
-        if not consent:
-            return False
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("EXECUTE consent_status(%s, %s)", (phone_hash, phone_number))
+            result = cursor.fetchone()
+
+        status = result[0] if result else None
+        self._cache_status(phone_hash, status)
+        return status
 
-        return consent["status"] == ConsentStatus.GRANTED.value
+    def has_valid_consent(self, phone_number: str) -> bool:
+        """Check if user has valid consent."""
+        return self._get_status(phone_number) == _GRANTED
 
     def needs_consent(self, phone_number: str) -> bool:
         """Check if user needs to provide consent."""
-        consent = self.get_user_consent(phone_number)
+        # No record, pending or declined all need consent
+        return self._get_status(phone_number) not in self._ANSWERED_STATUSES
 
-        if not consent:
-            return True
+    def get_user_consents_bulk(self, phone_numbers: List[str]) -> Dict[str, Dict]:
+        """
+        Get consent records for several users in one query (batched webhooks).
+
+        Unlike get_user_consent, legacy plain-phone records are returned but
+        not migrated.
+
+        Args:
+            phone_numbers: Phone numbers to look up
+
+        Returns:
+            Consent record per phone number; users without a record are omitted
+        """
+        by_hash = {self.encryption.hash_phone_number(p): p for p in phone_numbers}
+        if not by_hash:
+            return {}
+
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT * FROM user_consents
+                WHERE phone_hash = ANY(%s)
+                   OR (phone_hash IS NULL AND phone_number = ANY(%s))
+            """, (list(by_hash), list(by_hash.values())))
 
-        return consent["status"] in [ConsentStatus.PENDING.value, ConsentStatus.DECLINED.value]
+            results = cursor.fetchall()
+
+        consents = {}
+        for row in results:
+            if row["phone_hash"]:
+                consents[by_hash[row["phone_hash"]]] = dict(row)
+            else:
+                consents.setdefault(row["phone_number"], dict(row))
+        return consents
+
+    def has_valid_consent_bulk(self, phone_numbers: List[str]) -> Dict[str, bool]:
+        """Batch has_valid_consent (one query)."""
+        consents = self.get_user_consents_bulk(phone_numbers)
+        return {
+            p: p in consents and consents[p]["status"] == _GRANTED
+            for p in phone_numbers
+        }
+
+    def needs_consent_bulk(self, phone_numbers: List[str]) -> Dict[str, bool]:
+        """Batch needs_consent (one query)."""
+        consents = self.get_user_consents_bulk(phone_numbers)
+        return {
+            p: p not in consents or consents[p]["status"] not in self._ANSWERED_STATUSES
+            for p in phone_numbers
+        }
 
     def record_data_deletion(self, phone_number: str) -> bool:
         """Record that user's data has been deleted."""
         phone_hash = self.encryption.hash_phone_number(phone_number)
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("EXECUTE consent_record_deletion(%s, %s)", (phone_hash, phone_number))
 
-        cursor.execute("""
-            UPDATE user_consents
-            SET data_deleted_at = CURRENT_TIMESTAMP,
-                metadata = metadata || '{"deletion_completed": true}'::jsonb
-            WHERE phone_hash = %s OR (phone_number = %s AND phone_hash IS NULL)
-            RETURNING id
-        """, (phone_hash, phone_number))
-
-        result = cursor.fetchone()
-        conn.commit()
-        conn.close()
+            result = cursor.fetchone()
 
         return result is not None
 
@@ -288,68 +569,78 @@ class ConsentManager:
         """Record data export request (GDPR right to portability)."""
         phone_hash = self.encryption.hash_phone_number(phone_number)
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE user_consents
-            SET data_export_requested_at = CURRENT_TIMESTAMP
-            WHERE phone_hash = %s OR (phone_number = %s AND phone_hash IS NULL)
-            RETURNING id
-        """, (phone_hash, phone_number))
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("EXECUTE consent_record_export(%s, %s)", (phone_hash, phone_number))
 
-        result = cursor.fetchone()
-        conn.commit()
-        conn.close()
+            result = cursor.fetchone()
 
         return result is not None
 
     def get_users_pending_deletion(self, days_inactive: int = 90) -> List[str]:
         """Get users who should have their data deleted (retention policy)."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT uc.phone_number
-            FROM user_consents uc
-            LEFT JOIN (
-                SELECT phone_number, MAX(timestamp) as last_message
-                FROM conversation_history
-                GROUP BY phone_number
-            ) ch ON uc.phone_number = ch.phone_number
-            WHERE uc.status = 'granted'
-              AND (ch.last_message IS NULL OR ch.last_message < NOW() - INTERVAL '%s days')
-              AND uc.data_deleted_at IS NULL
-        """, (days_inactive,))
-
-        results = cursor.fetchall()
-        conn.close()
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT uc.phone_number
+                FROM user_consents uc
+                {_LAST_MESSAGE_JOIN}
+                WHERE uc.status = 'granted'
+                  AND (ch.last_message IS NULL OR ch.last_message < NOW() - make_interval(days => %s))
+                  AND uc.data_deleted_at IS NULL
+            """, (int(days_inactive),))
+
+            results = cursor.fetchall()
+
+        return [r[0] for r in results]
+
+    def mark_and_fetch_pending_deletion(self, days_inactive: int = 90) -> List[str]:
+        """
+        Flag users due for deletion (retention policy) and return them, in one statement.
+
+        Sets data_deletion_requested_at on every inactive granted user whose
+        data isn't deleted yet, so callers don't need a follow-up UPDATE per user.
+
+        Args:
+            days_inactive: Days without messages before data is due for deletion
+
+        Returns:
+            Phone numbers (as stored) of the flagged users
+        """
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(f"""
+                WITH candidates AS (
+                    SELECT uc.id
+                    FROM user_consents uc
+                    {_LAST_MESSAGE_JOIN}
+                    WHERE uc.status = 'granted'
+                      AND uc.data_deleted_at IS NULL
+                      AND (ch.last_message IS NULL OR ch.last_message < NOW() - make_interval(days => %s))
+                )
+                UPDATE user_consents
+                SET data_deletion_requested_at = NOW()
+                FROM candidates
+                WHERE user_consents.id = candidates.id
+                RETURNING user_consents.phone_number
+            """, (int(days_inactive),))
+
+            results = cursor.fetchall()
 
         return [r[0] for r in results]
 
     def get_consent_statistics(self) -> Dict:
         """Get consent statistics for compliance reporting."""
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        cursor.execute("""
-            SELECT
-                region,
-                status,
-                COUNT(*) as count
-            FROM user_consents
-            GROUP BY region, status
-            ORDER BY region, status
-        """)
-
-        results = cursor.fetchall()
-        conn.close()
-
-        stats = {}
-        for row in results:
-            region = row["region"]
-            if region not in stats:
-                stats[region] = {}
-            stats[region][row["status"]] = row["count"]
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    region,
+                    status,
+                    COUNT(*) as count
+                FROM user_consents
+                GROUP BY region, status
+                ORDER BY region, status
+            """)
+
+            stats = {}
+            for region, status, count in cursor:
+                stats.setdefault(region, {})[status] = count
 
         return stats
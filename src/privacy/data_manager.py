@@ -8,37 +8,140 @@ Taiwan PDPA, and China PIPL requirements.
 import os
 import json
 import logging
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, List
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
-from .consent_manager import ConsentManager, ConsentStatus
+from .consent_manager import ConsentManager, ConsentStatus, _LAST_MESSAGE_JOIN
+from .encryption import EncryptedFieldManager
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is missing
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+# Rows belonging to one user: hashed rows by phone_hash, legacy rows
+# (written before encryption) by their plain phone number
+_USER_ROWS = "(phone_hash = %(phone_hash)s OR (phone_hash IS NULL AND phone_number = %(phone)s))"
+
+# Same for a whole victims CTE of user_consents rows
+_VICTIM_ROWS = """(
+    phone_hash IN (SELECT phone_hash FROM victims)
+    OR (phone_hash IS NULL AND phone_number IN (SELECT phone_number FROM victims))
+)"""
+
+# Per-user singleton records of an export (json_build_object arguments)
+_EXPORT_RECORDS_SQL = f"""
+    'consent', (
+        SELECT to_jsonb(c) FROM (
+            SELECT region, status, language, consent_given_at, created_at
+            FROM user_consents
+            WHERE {_USER_ROWS}
+            LIMIT 1
+        ) c
+    ),
+    'memory', (
+        SELECT to_jsonb(m) FROM (
+            SELECT profile, preferences, facts, topics_discussed,
+                   personality_notes, language, last_updated
+            FROM user_memories
+            WHERE {_USER_ROWS}
+            LIMIT 1
+        ) m
+    ),
+    'session', (
+        SELECT to_jsonb(s) FROM (
+            SELECT current_character, language, last_activity
+            FROM user_sessions
+            WHERE {_USER_ROWS}
+            LIMIT 1
+        ) s
+    )
+"""
+
+
+# Granted users with no activity since %(cutoff)s whose data still exists
+_RETENTION_VICTIMS_SQL = f"""
+    SELECT uc.id, uc.phone_hash, uc.phone_number, uc.region, ch.last_message AS last_activity
+    FROM user_consents uc
+    {_LAST_MESSAGE_JOIN}
+    WHERE uc.status = 'granted'
+      AND uc.data_deleted_at IS NULL
+      AND (ch.last_message IS NULL OR ch.last_message < %(cutoff)s)
+"""
+
+# Compliance counters for get_data_statistics() in a single round trip
+_DATA_STATISTICS_SQL = f"""
+    SELECT
+        (
+            SELECT json_object_agg(region, count)
+            FROM (
+                SELECT region, COUNT(*) AS count
+                FROM user_consents
+                WHERE status = 'granted'
+                GROUP BY region
+            ) by_region
+        ) AS users_by_region,
+        (SELECT COUNT(*) FROM conversation_history) AS total_conversations,
+        (
+            SELECT COUNT(*) FROM user_consents
+            WHERE data_deletion_requested_at IS NOT NULL
+        ) AS deletion_requests,
+        (
+            SELECT COUNT(*) FROM user_consents
+            WHERE data_export_requested_at IS NOT NULL
+        ) AS export_requests,
+        (SELECT COUNT(*) FROM ({_RETENTION_VICTIMS_SQL}) victims) AS pending_retention_deletion
+"""
+
+
+def _json_line(obj) -> bytes:
+    """Serialize to one UTF-8 JSON line, datetimes as ISO-8601 (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False, default=lambda o: o.isoformat()) + "\n").encode('utf-8')
+
+
 class DataManager:
     """Manage user data lifecycle - deletion, export, retention."""
 
     # Default retention period (days)
     DEFAULT_RETENTION_DAYS = 90
 
-    def __init__(self):
-        self.connection_params = {
-            "host": os.getenv("POSTGRES_HOST", "localhost"),
-            "port": int(os.getenv("POSTGRES_PORT", "5432")),
-            "user": os.getenv("POSTGRES_USER", "sisters"),
-            "password": os.getenv("POSTGRES_PASSWORD"),
-            "database": os.getenv("POSTGRES_DB", "sisters_on_whatsapp"),
-        }
-        self.consent_manager = ConsentManager()
+    # Users deleted per transaction by the retention policy
+    DEFAULT_DELETION_BATCH_SIZE = 10_000
+
+    # Rows per server-side cursor fetch when streaming exports
+    EXPORT_FETCH_SIZE = 2000
+
+    # Rows handed to one worker thread when re-encrypting in bulk
+    ENCRYPT_CHUNK_SIZE = 256
+
+    def __init__(self, consent_manager: Optional[ConsentManager] = None):
+        """
+        Args:
+            consent_manager: ConsentManager to share (and its connection pool);
+                a new one is created if omitted
+        """
+        self.consent_manager = consent_manager or ConsentManager()
         self.retention_days = int(os.getenv("DATA_RETENTION_DAYS", self.DEFAULT_RETENTION_DAYS))
+        self.deletion_batch_size = int(os.getenv("DELETION_BATCH_SIZE", self.DEFAULT_DELETION_BATCH_SIZE))
 
-    def _get_connection(self):
-        """Get database connection."""
-        return psycopg2.connect(**self.connection_params, connect_timeout=10)
+    def _connection(self):
+        """Borrow a connection from the shared pool; commits on success, rolls back on error."""
+        return self.consent_manager._connection(prepare=False)
+
+    def _user_params(self, phone_number: str) -> Dict[str, str]:
+        """Query parameters for _USER_ROWS."""
+        return {
+            "phone": phone_number,
+            "phone_hash": self.consent_manager.encryption.hash_phone_number(phone_number),
+        }
 
     def delete_user_data(self, phone_number: str, reason: str = "user_request") -> Dict:
         """
@@ -51,66 +154,58 @@ class DataManager:
         Returns:
             Summary of deleted data
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
+        now_iso = datetime.now(timezone.utc).isoformat()
         deleted = {
             "phone_number": phone_number[:6] + "...",
             "reason": reason,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso,
             "deleted_records": {}
         }
 
         try:
-            # 1. Delete conversation history
-            cursor.execute("""
-                DELETE FROM conversation_history
-                WHERE phone_number = %s
-                RETURNING id
-            """, (phone_number,))
-            deleted["deleted_records"]["conversation_history"] = cursor.rowcount
-
-            # 2. Delete user memories
-            cursor.execute("""
-                DELETE FROM user_memories
-                WHERE phone_number = %s
-                RETURNING id
-            """, (phone_number,))
-            deleted["deleted_records"]["user_memories"] = cursor.rowcount
-
-            # 3. Delete user sessions
-            cursor.execute("""
-                DELETE FROM user_sessions
-                WHERE phone_number = %s
-                RETURNING id
-            """, (phone_number,))
-            deleted["deleted_records"]["user_sessions"] = cursor.rowcount
-
-            # 4. Update consent record (don't delete - keep for audit)
-            cursor.execute("""
-                UPDATE user_consents
-                SET status = %s,
-                    consent_withdrawn_at = CURRENT_TIMESTAMP,
-                    data_deleted_at = CURRENT_TIMESTAMP,
-                    metadata = metadata || %s::jsonb
-                WHERE phone_number = %s
-            """, (
-                ConsentStatus.WITHDRAWN.value,
-                json.dumps({"deletion_reason": reason, "deleted_at": datetime.now().isoformat()}),
-                phone_number
-            ))
-            deleted["deleted_records"]["consent_updated"] = cursor.rowcount > 0
-
-            conn.commit()
-            logger.info(f"Deleted data for {phone_number[:6]}...: {deleted['deleted_records']}")
+            with self._connection() as conn, conn.cursor() as cursor:
+                # All deletes plus the consent update (kept for audit, not
+                # deleted) in one statement
+                cursor.execute(f"""
+                    WITH history AS (
+                        DELETE FROM conversation_history WHERE {_USER_ROWS} RETURNING 1
+                    ), memories AS (
+                        DELETE FROM user_memories WHERE {_USER_ROWS} RETURNING 1
+                    ), sessions AS (
+                        DELETE FROM user_sessions WHERE {_USER_ROWS} RETURNING 1
+                    ), consent AS (
+                        UPDATE user_consents
+                        SET status = %(status)s,
+                            consent_withdrawn_at = CURRENT_TIMESTAMP,
+                            data_deleted_at = CURRENT_TIMESTAMP,
+                            metadata = metadata || %(metadata)s::jsonb
+                        WHERE {_USER_ROWS}
+                        RETURNING 1
+                    )
+                    SELECT (SELECT count(*) FROM history),
+                           (SELECT count(*) FROM memories),
+                           (SELECT count(*) FROM sessions),
+                           EXISTS(SELECT 1 FROM consent)
+                """, {
+                    **self._user_params(phone_number),
+                    "status": ConsentStatus.WITHDRAWN.value,
+                    "metadata": json.dumps({"deletion_reason": reason, "deleted_at": now_iso})
+                })
+                history, memories, sessions, consent_updated = cursor.fetchone()
+
+            deleted["deleted_records"].update({
+                "conversation_history": history,
+                "user_memories": memories,
+                "user_sessions": sessions,
+                "consent_updated": consent_updated
+            })
 
         except Exception as e:
-            conn.rollback()
             logger.error(f"Data deletion failed for {phone_number[:6]}...: {e}")
             raise
 
-        finally:
-            conn.close()
+        self.consent_manager.invalidate_cached_status(phone_number)
+        logger.info(f"Deleted data for {phone_number[:6]}...: {deleted['deleted_records']}")
 
         return deleted
 
@@ -124,64 +219,88 @@ class DataManager:
         Returns:
             All user data in portable format
         """
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
         export_data = {
-            "export_date": datetime.now().isoformat(),
+            "export_date": datetime.now(timezone.utc).isoformat(),
             "phone_number": phone_number,
             "data": {}
         }
 
-        try:
-            # 1. Consent record
-            cursor.execute("""
-                SELECT region, status, language, consent_given_at, created_at
-                FROM user_consents
-                WHERE phone_number = %s
-            """, (phone_number,))
-            consent = cursor.fetchone()
-            export_data["data"]["consent"] = dict(consent) if consent else None
-
-            # 2. Conversation history
-            cursor.execute("""
-                SELECT character, role, content, timestamp
-                FROM conversation_history
-                WHERE phone_number = %s
-                ORDER BY timestamp ASC
-            """, (phone_number,))
-            conversations = cursor.fetchall()
-            export_data["data"]["conversations"] = [dict(c) for c in conversations]
-
-            # 3. User memories
-            cursor.execute("""
-                SELECT profile, preferences, facts, topics_discussed,
-                       personality_notes, language, last_updated
-                FROM user_memories
-                WHERE phone_number = %s
-            """, (phone_number,))
-            memory = cursor.fetchone()
-            export_data["data"]["memory"] = dict(memory) if memory else None
-
-            # 4. Session data
-            cursor.execute("""
-                SELECT current_character, language, last_activity
-                FROM user_sessions
-                WHERE phone_number = %s
-            """, (phone_number,))
-            session = cursor.fetchone()
-            export_data["data"]["session"] = dict(session) if session else None
-
-            # Record export request
-            self.consent_manager.record_data_export_request(phone_number)
-
-            logger.info(f"Exported data for {phone_number[:6]}...")
-
-        finally:
-            conn.close()
+        # Everything in one round trip; timestamps come back as ISO strings
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT json_build_object(
+                    {_EXPORT_RECORDS_SQL},
+                    'conversations', COALESCE((
+                        SELECT jsonb_agg(to_jsonb(h) ORDER BY h.timestamp ASC)
+                        FROM (
+                            SELECT character, role, content, timestamp
+                            FROM conversation_history
+                            WHERE {_USER_ROWS}
+                        ) h
+                    ), '[]'::jsonb)
+                )
+            """, self._user_params(phone_number))
+
+            export_data["data"] = cursor.fetchone()[0]
+
+        # Record export request
+        self.consent_manager.record_data_export_request(phone_number)
+
+        logger.info(f"Exported data for {phone_number[:6]}...")
 
         return export_data
 
+    def export_user_data_jsonl(self, phone_number: str, path: str) -> int:
+        """
+        Stream a user's data export to a JSON Lines file (for long histories).
+
+        The first line holds the export header and the consent, memory and
+        session records; every following line is one conversation message,
+        read through a server-side cursor instead of being loaded at once.
+
+        Args:
+            phone_number: User's phone number
+            path: File to write
+
+        Returns:
+            Number of conversation messages written
+        """
+        written = 0
+
+        with self._connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT json_build_object({_EXPORT_RECORDS_SQL})",
+                    self._user_params(phone_number)
+                )
+                header = {
+                    "export_date": datetime.now(timezone.utc).isoformat(),
+                    "phone_number": phone_number,
+                    "data": cursor.fetchone()[0]
+                }
+
+            with open(path, "wb") as f, \
+                    conn.cursor(name="export_conversations", cursor_factory=RealDictCursor) as cursor:
+                f.write(_json_line(header))
+
+                cursor.itersize = self.EXPORT_FETCH_SIZE
+                cursor.execute(f"""
+                    SELECT character, role, content, timestamp
+                    FROM conversation_history
+                    WHERE {_USER_ROWS}
+                    ORDER BY timestamp ASC
+                """, self._user_params(phone_number))
+
+                for row in cursor:
+                    f.write(_json_line(dict(row)))
+                    written += 1
+
+        # Record export request
+        self.consent_manager.record_data_export_request(phone_number)
+
+        logger.info(f"Exported data for {phone_number[:6]}... to {path} ({written} messages)")
+        return written
+
     def apply_retention_policy(self, dry_run: bool = False) -> Dict:
         """
         Apply data retention policy - delete data older than retention period.
@@ -192,10 +311,8 @@ class DataManager:
         Returns:
             Summary of affected users
         """
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        cutoff_date = datetime.now() - timedelta(days=self.retention_days)
+        now = datetime.now(timezone.utc)
+        cutoff_date = now - timedelta(days=self.retention_days)
 
         result = {
             "retention_days": self.retention_days,
@@ -204,21 +321,63 @@ class DataManager:
             "users_affected": []
         }
 
-        try:
-            # Find users with no activity since cutoff
-            cursor.execute("""
-                SELECT uc.phone_number, uc.region,
-                       MAX(ch.timestamp) as last_activity
-                FROM user_consents uc
-                LEFT JOIN conversation_history ch ON uc.phone_number = ch.phone_number
-                WHERE uc.status = 'granted'
-                  AND uc.data_deleted_at IS NULL
-                GROUP BY uc.phone_number, uc.region
-                HAVING MAX(ch.timestamp) IS NULL
-                   OR MAX(ch.timestamp) < %s
-            """, (cutoff_date,))
-
-            users = cursor.fetchall()
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            if dry_run:
+                cursor.execute(_RETENTION_VICTIMS_SQL, {"cutoff": cutoff_date})
+                users = cursor.fetchall()
+            else:
+                # Select, delete and mark one batch per statement, all server-side;
+                # one transaction per batch so earlier batches stay deleted if one fails
+                metadata = json.dumps({
+                    "deletion_reason": "retention_policy",
+                    "deleted_at": now.isoformat()
+                })
+                users = []
+                while True:
+                    try:
+                        cursor.execute(f"""
+                            WITH victims AS (
+                                {_RETENTION_VICTIMS_SQL}
+                                LIMIT %(batch_size)s
+                            ), history AS (
+                                DELETE FROM conversation_history WHERE {_VICTIM_ROWS}
+                            ), memories AS (
+                                DELETE FROM user_memories WHERE {_VICTIM_ROWS}
+                            ), sessions AS (
+                                DELETE FROM user_sessions WHERE {_VICTIM_ROWS}
+                            )
+                            UPDATE user_consents
+                            SET status = %(status)s,
+                                consent_withdrawn_at = CURRENT_TIMESTAMP,
+                                data_deleted_at = CURRENT_TIMESTAMP,
+                                metadata = metadata || %(metadata)s::jsonb
+                            FROM victims
+                            WHERE user_consents.id = victims.id
+                            RETURNING victims.phone_hash, victims.phone_number,
+                                      victims.region, victims.last_activity
+                        """, {
+                            "cutoff": cutoff_date,
+                            "batch_size": self.deletion_batch_size,
+                            "status": ConsentStatus.WITHDRAWN.value,
+                            "metadata": metadata
+                        })
+                        batch = cursor.fetchall()
+                        conn.commit()
+                    except Exception as e:
+                        logger.error(f"Retention deletion failed after {len(users)} users: {e}")
+                        raise
+
+                    for user in batch:
+                        if user["phone_hash"]:
+                            self.consent_manager.invalidate_cached_hash(user["phone_hash"])
+                        else:
+                            self.consent_manager.invalidate_cached_status(user["phone_number"])
+                    users.extend(batch)
+
+                    if batch:
+                        logger.info(f"Retention policy: deleted data for {len(batch)} users")
+                    if len(batch) < self.deletion_batch_size:
+                        break
 
             for user in users:
                 user_info = {
@@ -228,73 +387,168 @@ class DataManager:
                 }
 
                 if not dry_run:
-                    self.delete_user_data(user["phone_number"], reason="retention_policy")
                     user_info["deleted"] = True
 
                 result["users_affected"].append(user_info)
 
             logger.info(f"Retention policy: {len(users)} users affected (dry_run={dry_run})")
 
-        finally:
-            conn.close()
-
         return result
 
-    def get_data_statistics(self) -> Dict:
-        """Get data storage statistics for compliance reporting."""
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+    def encrypt_existing_data(self, table: str, batch_size: int = 5000,
+                              workers: Optional[int] = None) -> int:
+        """
+        Encrypt rows written before encryption was enabled (one-off backfill).
 
-        stats = {}
+        Rows without a phone_hash are read in id order, batch_size at a time,
+        encrypted on a thread pool and written back with one multi-row UPDATE
+        per batch; each batch is its own transaction, so the backfill can be
+        stopped and resumed.
 
-        try:
-            # Total users by region
-            cursor.execute("""
-                SELECT region, COUNT(*) as count
-                FROM user_consents
-                WHERE status = 'granted'
-                GROUP BY region
-            """)
-            stats["users_by_region"] = {row["region"]: row["count"] for row in cursor.fetchall()}
+        Args:
+            table: One of EncryptedFieldManager.SENSITIVE_FIELDS (needs id and phone_hash columns)
+            batch_size: Rows per batch
+            workers: Encryption threads (default: CPU count)
 
-            # Total conversations
-            cursor.execute("SELECT COUNT(*) as count FROM conversation_history")
-            stats["total_conversations"] = cursor.fetchone()["count"]
+        Returns:
+            Number of rows encrypted
+        """
+        field_manager = EncryptedFieldManager()
+        fields = list(field_manager.SENSITIVE_FIELDS[table])
+        columns = fields + ["phone_hash"]
+
+        select_sql = f"""
+            SELECT id, {", ".join(fields)}
+            FROM {table}
+            WHERE phone_hash IS NULL AND id > %s
+            ORDER BY id
+            LIMIT %s
+        """
+        update_sql = f"""
+            UPDATE {table} AS t
+            SET {", ".join(f"{c} = COALESCE(data.{c}, t.{c})" for c in columns)}
+            FROM (VALUES %s) AS data(id, {", ".join(columns)})
+            WHERE t.id = data.id
+        """
 
-            # Data deletion requests
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM user_consents
-                WHERE data_deletion_requested_at IS NOT NULL
-            """)
-            stats["deletion_requests"] = cursor.fetchone()["count"]
+        def encrypt_chunk(chunk: List[Dict]) -> List[Dict]:
+            # Decrypt first so partly encrypted rows aren't double-encrypted
+            # and the hash is taken from the plain phone number
+            plain = [field_manager.decrypt_record(table, dict(r), in_place=True) for r in chunk]
+            return field_manager.encrypt_records(table, plain, in_place=True)
+
+        encrypted_count = 0
+        last_id = 0
+        chunk_size = self.ENCRYPT_CHUNK_SIZE
+
+        # cryptography releases the GIL inside OpenSSL, so threads scale the
+        # CPU-bound part; DB writes stay on this thread's single connection
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor, \
+                self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            while True:
+                cursor.execute(select_sql, (last_id, batch_size))
+                records = cursor.fetchall()
+                if not records:
+                    break
+
+                chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+                encrypted = [r for chunk in executor.map(encrypt_chunk, chunks) for r in chunk]
+                execute_values(
+                    cursor,
+                    update_sql,
+                    [tuple(r.get(c) for c in ["id"] + columns) for r in encrypted],
+                    page_size=1000
+                )
+                conn.commit()
+
+                encrypted_count += len(records)
+                last_id = records[-1]["id"]
+                logger.info(f"Encrypted {encrypted_count} rows in {table}")
+
+        return encrypted_count
+
+    def upgrade_legacy_tokens(self, table: str, batch_size: int = 5000) -> int:
+        """
+        Rewrite legacy double-encoded ciphertexts (Z0FBQUFB...) in native Fernet format.
 
-            # Data export requests
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM user_consents
-                WHERE data_export_requested_at IS NOT NULL
-            """)
-            stats["export_requests"] = cursor.fetchone()["count"]
-
-            # Users pending deletion (retention policy)
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM user_consents uc
-                LEFT JOIN (
-                    SELECT phone_number, MAX(timestamp) as last_msg
-                    FROM conversation_history
-                    GROUP BY phone_number
-                ) ch ON uc.phone_number = ch.phone_number
-                WHERE uc.status = 'granted'
-                  AND (ch.last_msg IS NULL OR ch.last_msg < NOW() - INTERVAL '%s days')
-            """, (self.retention_days,))
-            stats["pending_retention_deletion"] = cursor.fetchone()["count"]
+        Legacy values pay an extra base64 decode on every read; rewriting
+        them once removes that cost. Only the outer encoding layer is
+        stripped, so nothing is decrypted or re-encrypted. Batches are
+        committed separately, as in encrypt_existing_data(). Only text and
+        phone fields are rewritten; json fields come back from psycopg2 as
+        dicts/lists and are left as they are.
 
-        finally:
-            conn.close()
+        Args:
+            table: One of EncryptedFieldManager.SENSITIVE_FIELDS
+            batch_size: Rows per batch
 
-        return stats
+        Returns:
+            Number of rows rewritten
+        """
+        field_manager = EncryptedFieldManager()
+        encryption = field_manager.encryption
+        fields = [
+            field for field, field_type in field_manager.SENSITIVE_FIELDS[table].items()
+            if field_type != 'json'
+        ]
+
+        select_sql = f"""
+            SELECT id, {", ".join(fields)}
+            FROM {table}
+            WHERE ({" OR ".join(f"{f}::text LIKE 'Z0FBQUFB%%'" for f in fields)})
+              AND id > %s
+            ORDER BY id
+            LIMIT %s
+        """
+        update_sql = f"""
+            UPDATE {table} AS t
+            SET {", ".join(f"{f} = data.{f}" for f in fields)}
+            FROM (VALUES %s) AS data(id, {", ".join(fields)})
+            WHERE t.id = data.id
+        """
+
+        upgraded_count = 0
+        last_id = 0
+
+        with self._connection() as conn, conn.cursor() as cursor:
+            while True:
+                cursor.execute(select_sql, (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                execute_values(
+                    cursor,
+                    update_sql,
+                    [
+                        (row[0],) + tuple(encryption.unwrap_legacy_token(v) for v in row[1:])
+                        for row in rows
+                    ],
+                    page_size=1000
+                )
+                conn.commit()
+
+                upgraded_count += len(rows)
+                last_id = rows[-1][0]
+                logger.info(f"Upgraded {upgraded_count} legacy rows in {table}")
+
+        return upgraded_count
+
+    def get_data_statistics(self) -> Dict:
+        """Get data storage statistics for compliance reporting (one query)."""
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(_DATA_STATISTICS_SQL, {"cutoff": cutoff_date})
+            row = cursor.fetchone()
+
+        return {
+            "users_by_region": row["users_by_region"] or {},
+            "total_conversations": row["total_conversations"],
+            "deletion_requests": row["deletion_requests"],
+            "export_requests": row["export_requests"],
+            "pending_retention_deletion": row["pending_retention_deletion"],
+        }
 
 
 class RetentionPolicyCron:
@@ -6,9 +6,12 @@ Uses hash-based lookup for phone numbers to enable queries on encrypted data.
 """
 
 import os
+import re
 import base64
 import hashlib
+import functools
 import json
+import time
 import logging
 from typing import Optional, Dict, Any, List, Union
 
@@ -16,8 +19,38 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is missing
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Token prefixes: legacy double-encoded ('Z0FBQUFB' is base64 of 'gAAAAA')
+# and Fernet's native format (version byte 0x80)
+_LEGACY_TOKEN_PREFIX = 'Z0FBQUFB'
+_TOKEN_PREFIX = 'gAAAAA'
+_ENCRYPTED_PREFIXES = (_LEGACY_TOKEN_PREFIX, _TOKEN_PREFIX)
+
+_PHONE_HASH_RE = re.compile(r'[0-9a-fA-F]{64}')
+
+# Characters dropped from phone numbers before hashing
+_PHONE_STRIP_TABLE = str.maketrans('', '', ' -\t')
+
+
+def _json_dumps(data) -> str:
+    """Serialize to a JSON string (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _json_loads(text: str):
+    """Parse a JSON string (orjson when available; raises json.JSONDecodeError)."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
 
 class ConversationEncryption:
     """
@@ -49,24 +82,8 @@ class ConversationEncryption:
         self._hash_salt = os.getenv("PHONE_HASH_SALT", "sisters_phone_salt_v1").encode()
 
     def _create_fernet(self, key_source: str) -> Fernet:
-        """Create Fernet instance from key source."""
-        # If it's already a valid Fernet key (44 chars base64), use directly
-        if len(key_source) == 44:
-            try:
-                return Fernet(key_source.encode())
-            except Exception:
-                pass
-
-        # Otherwise, derive a key using PBKDF2
-        salt = b"sisters_on_whatsapp_v1"  # Static salt (key is already secret)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(key_source.encode()))
-        return Fernet(key)
+        """Create Fernet instance from key source (cached per process)."""
+        return _create_fernet(key_source)
 
     def _looks_like_fernet_token(self, text: str) -> bool:
         """
@@ -121,6 +138,32 @@ class ConversationEncryption:
             logger.error(f"Encryption failed: {e}")
             raise
 
+    def encrypt_many(self, plaintexts: List[str]) -> List[str]:
+        """
+        Encrypt several strings at once (e.g. all fields of a record).
+
+        Produces the same tokens as encrypt(), but draws all IVs with one
+        os.urandom call and stamps every token with one timestamp.
+
+        Args:
+            plaintexts: Texts to encrypt (empty values are returned as-is)
+
+        Returns:
+            Encrypted strings, in input order
+        """
+        # Fernet's internal per-token encoder; fall back if a release drops it
+        encrypt_from_parts = getattr(self.fernet, "_encrypt_from_parts", None)
+        if encrypt_from_parts is None:
+            return [self.encrypt(p) for p in plaintexts]
+
+        ivs = os.urandom(16 * len(plaintexts))
+        now = int(time.time())
+
+        return [
+            encrypt_from_parts(p.encode('utf-8'), now, ivs[16 * i:16 * i + 16]).decode('utf-8') if p else p
+            for i, p in enumerate(plaintexts)
+        ]
+
     def decrypt(self, ciphertext: str) -> str:
         """
         Decrypt ciphertext string.
@@ -143,12 +186,13 @@ class ConversationEncryption:
 
             # Check if it's double-encoded (legacy format)
             # Double-encoded strings start with 'Z0FBQUFB' which decodes to 'gAAAAA'
-            if ciphertext.startswith('Z0FBQUFB'):
-                # Legacy double-encoded: decode base64 first, then decrypt
-                encrypted = base64.urlsafe_b64decode(ciphertext.encode('utf-8'))
-                decrypted = self.fernet.decrypt(encrypted)
+            if ciphertext.startswith(_LEGACY_TOKEN_PREFIX):
+                # Legacy double-encoded: the outer base64 layer wraps a native
+                # Fernet token, so strip it once and decrypt the inner token
+                inner = base64.urlsafe_b64decode(ciphertext.encode('utf-8'))
+                decrypted = self.fernet.decrypt(inner)
                 result = decrypted.decode('utf-8')
-            elif ciphertext.startswith('gAAAAA'):
+            elif ciphertext.startswith(_TOKEN_PREFIX):
                 # New single-encoded format: Fernet's native base64
                 decrypted = self.fernet.decrypt(ciphertext.encode('utf-8'))
                 result = decrypted.decode('utf-8')
@@ -179,17 +223,7 @@ class ConversationEncryption:
         if not text:
             return False
 
-        # Check for double-encoded format (legacy)
-        # 'Z0FBQUFB' is base64 encoding of 'gAAAAA' (Fernet token prefix)
-        if text.startswith('Z0FBQUFB'):
-            return True
-
-        # Check for single-encoded format (new/correct)
-        # Fernet tokens start with 'gAAAAA' (version byte 0x80 = 128)
-        if text.startswith('gAAAAA'):
-            return True
-
-        return False
+        return text.startswith(_ENCRYPTED_PREFIXES)
 
     def encrypt_if_needed(self, text: str) -> str:
         """Encrypt text only if not already encrypted."""
@@ -203,6 +237,24 @@ class ConversationEncryption:
             return text
         return self.decrypt(text)
 
+    def unwrap_legacy_token(self, ciphertext: str) -> str:
+        """
+        Convert a legacy double-encoded token to the native Fernet format.
+
+        No key is needed: the legacy format is just base64 over a regular
+        Fernet token. Values in any other format (including non-strings,
+        e.g. json columns decoded by the driver) are returned unchanged.
+
+        Args:
+            ciphertext: Stored value
+
+        Returns:
+            Single-encoded token (gAAAAA...) or the original value
+        """
+        if not isinstance(ciphertext, str) or not ciphertext.startswith(_LEGACY_TOKEN_PREFIX):
+            return ciphertext
+        return base64.urlsafe_b64decode(ciphertext.encode('utf-8')).decode('ascii')
+
     def hash_phone_number(self, phone_number: str) -> str:
         """
         Create a deterministic hash of phone number for database lookups.
@@ -220,27 +272,21 @@ class ConversationEncryption:
             return phone_number
 
         # Normalize phone number (remove spaces, ensure + prefix)
-        normalized = phone_number.strip().replace(" ", "").replace("-", "")
+        normalized = phone_number.translate(_PHONE_STRIP_TABLE).strip()
 
-        # Create salted hash
-        salted = self._hash_salt + normalized.encode('utf-8')
-        return hashlib.sha256(salted).hexdigest()
+        return _hash_phone(self._hash_salt, normalized)
 
     def is_phone_hash(self, value: str) -> bool:
         """Check if value looks like a phone hash (64 hex chars)."""
         if not value or len(value) != 64:
             return False
-        try:
-            int(value, 16)
-            return True
-        except ValueError:
-            return False
+        return _PHONE_HASH_RE.fullmatch(value) is not None
 
     def encrypt_json(self, data: Union[dict, list]) -> str:
         """Encrypt a JSON-serializable object."""
         if data is None:
             return None
-        json_str = json.dumps(data, ensure_ascii=False)
+        json_str = _json_dumps(data)
         return self.encrypt(json_str)
 
     def decrypt_json(self, ciphertext: str) -> Union[dict, list, None]:
@@ -254,16 +300,64 @@ class ConversationEncryption:
         if decrypted == ciphertext:
             # Try parsing as JSON directly
             try:
-                return json.loads(ciphertext)
+                return _json_loads(ciphertext)
             except json.JSONDecodeError:
                 return ciphertext
 
         try:
-            return json.loads(decrypted)
+            return _json_loads(decrypted)
         except json.JSONDecodeError:
             return decrypted
 
 
+@functools.lru_cache(maxsize=4)
+def _create_fernet(key_source: str) -> Fernet:
+    """
+    Create Fernet instance from key source.
+
+    Cached because PBKDF2 (100k iterations) is slow and every
+    ConversationEncryption would otherwise re-derive the same key. Keys
+    are not expected to rotate within a running process; call
+    _create_fernet.cache_clear() if they do.
+    """
+    # If it's already a valid Fernet key (44 chars base64), use directly
+    if len(key_source) == 44:
+        try:
+            return Fernet(key_source.encode())
+        except Exception:
+            pass
+
+    # Otherwise, derive a key using PBKDF2
+    salt = b"sisters_on_whatsapp_v1"  # Static salt (key is already secret)
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    key = base64.urlsafe_b64encode(kdf.derive(key_source.encode()))
+    return Fernet(key)
+
+
+@functools.lru_cache(maxsize=8)
+def _salted_sha256(salt: bytes):
+    """SHA-256 state with the salt already absorbed (copied, never updated)."""
+    return hashlib.sha256(salt)
+
+
+@functools.lru_cache(maxsize=16384)
+def _hash_phone(salt: bytes, normalized: str) -> str:
+    """
+    Salted SHA-256 of a normalized phone number, i.e. sha256(salt + normalized).
+
+    Cached per process: the same numbers are hashed over and over
+    (consent check, lookup, write) for every message.
+    """
+    h = _salted_sha256(salt).copy()
+    h.update(normalized.encode('utf-8'))
+    return h.hexdigest()
+
+
 class EncryptedFieldManager:
     """
     Manages encryption for all sensitive database fields.
@@ -354,13 +448,15 @@ class EncryptedFieldManager:
         else:
             return value
 
-    def encrypt_record(self, table: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def encrypt_record(self, table: str, record: Dict[str, Any], *,
+                       in_place: bool = False) -> Dict[str, Any]:
         """
         Encrypt all sensitive fields in a database record.
 
         Args:
             table: Table name
             record: Record dict with field values
+            in_place: Modify record itself instead of a copy (caller owns the dict)
 
         Returns:
             Record with sensitive fields encrypted
@@ -368,25 +464,59 @@ class EncryptedFieldManager:
         if table not in self.SENSITIVE_FIELDS:
             return record
 
-        encrypted = record.copy()
+        encrypted = record if in_place else record.copy()
         field_types = self.SENSITIVE_FIELDS[table]
 
+        # Collect plaintexts so the whole record is encrypted in one batch
+        fields = []
+        plaintexts = []
         for field, field_type in field_types.items():
             if field in encrypted and encrypted[field] is not None:
                 # For phone fields, also add hash for lookup
                 if field_type == 'phone' and field == 'phone_number':
                     encrypted['phone_hash'] = self.get_phone_hash(encrypted[field])
-                encrypted[field] = self.encrypt_field(encrypted[field], field_type)
+
+                if field_type == 'text':
+                    plaintext = str(encrypted[field])
+                elif field_type == 'json':
+                    plaintext = _json_dumps(encrypted[field])
+                elif field_type == 'phone':
+                    plaintext = encrypted[field]
+                else:
+                    continue
+
+                fields.append(field)
+                plaintexts.append(plaintext)
+
+        for field, ciphertext in zip(fields, self.encryption.encrypt_many(plaintexts)):
+            encrypted[field] = ciphertext
 
         return encrypted
 
-    def decrypt_record(self, table: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def encrypt_records(self, table: str, records: List[Dict[str, Any]], *,
+                        in_place: bool = False) -> List[Dict[str, Any]]:
+        """
+        Encrypt many records of one table (bulk migration/backfill).
+
+        Args:
+            table: Table name
+            records: Record dicts with field values
+            in_place: Modify the record dicts themselves instead of copies
+
+        Returns:
+            Records with sensitive fields encrypted, in input order
+        """
+        return [self.encrypt_record(table, record, in_place=in_place) for record in records]
+
+    def decrypt_record(self, table: str, record: Dict[str, Any], *,
+                       in_place: bool = False) -> Dict[str, Any]:
         """
         Decrypt all sensitive fields in a database record.
 
         Args:
             table: Table name
             record: Record dict with encrypted field values
+            in_place: Modify record itself instead of a copy (caller owns the dict)
 
         Returns:
             Record with sensitive fields decrypted
@@ -394,7 +524,7 @@ class EncryptedFieldManager:
         if table not in self.SENSITIVE_FIELDS:
             return record
 
-        decrypted = record.copy()
+        decrypted = record if in_place else record.copy()
         field_types = self.SENSITIVE_FIELDS[table]
 
         for field, field_type in field_types.items():
@@ -416,8 +546,9 @@ class EncryptedConversationStore:
     """
 
     def __init__(self):
-        self.encryption = ConversationEncryption()
         self.field_manager = EncryptedFieldManager()
+        # Share the field manager's instance instead of setting up a second one
+        self.encryption = self.field_manager.encryption
 
     def get_phone_hash(self, phone_number: str) -> str:
         """Get hash for phone number lookup in database."""
@@ -4,11 +4,15 @@ Privacy Policy Messages - Multi-region support
 Supports: EU (GDPR), US (CCPA), Taiwan (PDPA), China (PIPL)
 """
 
-from typing import Dict, Optional
+import functools
+import re
+from typing import Dict, Optional, Tuple
 from enum import Enum
 
 
-class Region(Enum):
+# str mixin: members hash and compare as their value strings (C-level, used as
+# dict keys on every message); .value is still the string stored in the DB
+class Region(str, Enum):
     """Supported regulatory regions."""
     EU = "eu"           # GDPR
     US = "us"           # CCPA/CPRA
@@ -69,6 +73,57 @@ PHONE_PREFIX_TO_REGION = {
     "+81": Region.EU,
 }
 
+# Digit trie over PHONE_PREFIX_TO_REGION (without "+"); the region of a
+# complete prefix is stored under _TRIE_REGION
+_TRIE_REGION = "region"
+
+
+def _build_prefix_trie() -> Dict:
+    trie: Dict = {}
+    for prefix, region in PHONE_PREFIX_TO_REGION.items():
+        node = trie
+        for digit in prefix.lstrip("+"):
+            node = node.setdefault(digit, {})
+        node[_TRIE_REGION] = region
+    return trie
+
+
+_PREFIX_TRIE = _build_prefix_trie()
+
+# Separators dropped from phone numbers before prefix detection
+_PHONE_STRIP_TABLE = str.maketrans("", "", " -")
+
+# Parts shared by every region's consent message (the privacy notice in
+# between is region-specific)
+_CONSENT_HEADER_EN = """👋 *Welcome to Sisters-On-WhatsApp!*
+
+We're three AI sisters who can help you:
+🌸 *Botan* - Streaming & pop culture
+🎵 *Kasho* - Music & life advice
+📚 *Yuri* - Books & creative thinking
+
+"""
+_CONSENT_FOOTER_EN = """
+
+📋 Full policy: {policy_url}
+
+Reply *AGREE* to continue, or *DECLINE* to opt out.
+Reply *DELETE* anytime to erase your data."""
+_CONSENT_HEADER_ZH = """👋 *歡迎來到Sisters-On-WhatsApp！*
+
+我們是三位AI姐妹：
+🌸 *牡丹* - 直播與流行文化
+🎵 *芍藥* - 音樂與人生建議
+📚 *百合* - 書籍與創意思考
+
+"""
+_CONSENT_FOOTER_ZH = """
+
+📋 完整條款：{policy_url}
+
+回覆 *AGREE* 繼續，或 *DECLINE* 選擇退出。
+隨時回覆 *DELETE* 可刪除您的資料。"""
+
 
 class PrivacyPolicyMessages:
     """Multi-region privacy policy messages."""
@@ -86,14 +141,7 @@ class PrivacyPolicyMessages:
     # Initial consent messages by region
     CONSENT_MESSAGES = {
         Region.EU: {
-            "en": """👋 *Welcome to Sisters-On-WhatsApp!*
-
-We're three AI sisters who can help you:
-🌸 *Botan* - Streaming & pop culture
-🎵 *Kasho* - Music & life advice
-📚 *Yuri* - Books & creative thinking
-
-🔒 *Privacy Notice (GDPR)*
+            "en": _CONSENT_HEADER_EN + """🔒 *Privacy Notice (GDPR)*
 Before we chat, please read our privacy practices:
 
 *What we collect:*
@@ -110,21 +158,9 @@ Before we chat, please read our privacy practices:
 *Data protection:*
 • Encrypted storage (AES-256)
 • No sharing with third parties
-• Data retained for 90 days of inactivity
-
-📋 Full policy: {policy_url}
-
-Reply *AGREE* to continue, or *DECLINE* to opt out.
-Reply *DELETE* anytime to erase your data.""",
-
-            "zh": """👋 *歡迎來到Sisters-On-WhatsApp！*
-
-我們是三位AI姐妹：
-🌸 *牡丹* - 直播與流行文化
-🎵 *芍藥* - 音樂與人生建議
-📚 *百合* - 書籍與創意思考
+• Data retained for 90 days of inactivity""" + _CONSENT_FOOTER_EN,
 
-🔒 *隱私聲明 (GDPR)*
+            "zh": _CONSENT_HEADER_ZH + """🔒 *隱私聲明 (GDPR)*
 在開始聊天之前，請閱讀我們的隱私條款：
 
 *我們收集的資料：*
@@ -141,23 +177,11 @@ Reply *DELETE* anytime to erase your data.""",
 *資料保護：*
 • 加密儲存 (AES-256)
 • 不與第三方分享
-• 資料在90天無活動後刪除
-
-📋 完整條款：{policy_url}
-
-回覆 *AGREE* 繼續，或 *DECLINE* 選擇退出。
-隨時回覆 *DELETE* 可刪除您的資料。"""
+• 資料在90天無活動後刪除""" + _CONSENT_FOOTER_ZH
         },
 
         Region.US: {
-            "en": """👋 *Welcome to Sisters-On-WhatsApp!*
-
-We're three AI sisters who can help you:
-🌸 *Botan* - Streaming & pop culture
-🎵 *Kasho* - Music & life advice
-📚 *Yuri* - Books & creative thinking
-
-🔒 *Privacy Notice (CCPA/CPRA)*
+            "en": _CONSENT_HEADER_EN + """🔒 *Privacy Notice (CCPA/CPRA)*
 Here's how we handle your information:
 
 *Information collected:*
@@ -174,21 +198,9 @@ Here's how we handle your information:
 *Security:*
 • Encrypted storage (AES-256)
 • No third-party sharing
-• 90-day retention policy
+• 90-day retention policy""" + _CONSENT_FOOTER_EN,
 
-📋 Full policy: {policy_url}
-
-Reply *AGREE* to continue, or *DECLINE* to opt out.
-Reply *DELETE* anytime to erase your data.""",
-
-            "zh": """👋 *歡迎來到Sisters-On-WhatsApp！*
-
-我們是三位AI姐妹：
-🌸 *牡丹* - 直播與流行文化
-🎵 *芍藥* - 音樂與人生建議
-📚 *百合* - 書籍與創意思考
-
-🔒 *隱私聲明 (CCPA/CPRA)*
+            "zh": _CONSENT_HEADER_ZH + """🔒 *隱私聲明 (CCPA/CPRA)*
 以下是我們處理您資訊的方式：
 
 *收集的資訊：*
@@ -205,23 +217,11 @@ Reply *DELETE* anytime to erase your data.""",
 *安全措施：*
 • 加密儲存 (AES-256)
 • 不與第三方分享
-• 90天保留政策
-
-📋 完整條款：{policy_url}
-
-回覆 *AGREE* 繼續，或 *DECLINE* 選擇退出。
-隨時回覆 *DELETE* 可刪除您的資料。"""
+• 90天保留政策""" + _CONSENT_FOOTER_ZH
         },
 
         Region.TAIWAN: {
-            "en": """👋 *Welcome to Sisters-On-WhatsApp!*
-
-We're three AI sisters who can help you:
-🌸 *Botan* - Streaming & pop culture
-🎵 *Kasho* - Music & life advice
-📚 *Yuri* - Books & creative thinking
-
-🔒 *Privacy Notice (Taiwan PDPA)*
+            "en": _CONSENT_HEADER_EN + """🔒 *Privacy Notice (Taiwan PDPA)*
 Please review our data practices:
 
 *Data collected:*
@@ -238,21 +238,9 @@ Please review our data practices:
 *Protection measures:*
 • Encrypted storage (AES-256)
 • No third-party disclosure
-• Data deleted after 90 days of inactivity
+• Data deleted after 90 days of inactivity""" + _CONSENT_FOOTER_EN,
 
-📋 Full policy: {policy_url}
-
-Reply *AGREE* to continue, or *DECLINE* to opt out.
-Reply *DELETE* anytime to erase your data.""",
-
-            "zh": """👋 *歡迎來到Sisters-On-WhatsApp！*
-
-我們是三位AI姐妹：
-🌸 *牡丹* - 直播與流行文化
-🎵 *芍藥* - 音樂與人生建議
-📚 *百合* - 書籍與創意思考
-
-🔒 *隱私聲明（台灣個資法）*
+            "zh": _CONSENT_HEADER_ZH + """🔒 *隱私聲明（台灣個資法）*
 請閱讀我們的資料處理方式：
 
 *收集的資料：*
@@ -269,23 +257,11 @@ Reply *DELETE* anytime to erase your data.""",
 *保護措施：*
 • 加密儲存 (AES-256)
 • 不對第三方揭露
-• 資料在90天無活動後刪除
-
-📋 完整條款：{policy_url}
-
-回覆 *AGREE* 繼續，或 *DECLINE* 選擇退出。
-隨時回覆 *DELETE* 可刪除您的資料。"""
+• 資料在90天無活動後刪除""" + _CONSENT_FOOTER_ZH
         },
 
         Region.CHINA: {
-            "en": """👋 *Welcome to Sisters-On-WhatsApp!*
-
-We're three AI sisters who can help you:
-🌸 *Botan* - Streaming & pop culture
-🎵 *Kasho* - Music & life advice
-📚 *Yuri* - Books & creative thinking
-
-🔒 *Privacy Notice (PIPL)*
+            "en": _CONSENT_HEADER_EN + """🔒 *Privacy Notice (PIPL)*
 Please review our data practices:
 
 *Personal information collected:*
@@ -303,21 +279,9 @@ Please review our data practices:
 • Encrypted storage (AES-256)
 • No unauthorized third-party access
 • Data deleted after 90 days of inactivity
-• Data processed within compliant infrastructure
-
-📋 Full policy: {policy_url}
+• Data processed within compliant infrastructure""" + _CONSENT_FOOTER_EN,
 
-Reply *AGREE* to continue, or *DECLINE* to opt out.
-Reply *DELETE* anytime to erase your data.""",
-
-            "zh": """👋 *歡迎來到Sisters-On-WhatsApp！*
-
-我們是三位AI姐妹：
-🌸 *牡丹* - 直播與流行文化
-🎵 *芍藥* - 音樂與人生建議
-📚 *百合* - 書籍與創意思考
-
-🔒 *隱私聲明（個人信息保護法）*
+            "zh": _CONSENT_HEADER_ZH + """🔒 *隱私聲明（個人信息保護法）*
 請閱讀我們的數據處理方式：
 
 *收集的個人信息：*
@@ -344,14 +308,7 @@ Reply *DELETE* anytime to erase your data.""",
         },
 
         Region.DEFAULT: {
-            "en": """👋 *Welcome to Sisters-On-WhatsApp!*
-
-We're three AI sisters who can help you:
-🌸 *Botan* - Streaming & pop culture
-🎵 *Kasho* - Music & life advice
-📚 *Yuri* - Books & creative thinking
-
-🔒 *Privacy Notice*
+            "en": _CONSENT_HEADER_EN + """🔒 *Privacy Notice*
 Please review our data practices:
 
 *Data collected:*
@@ -367,21 +324,9 @@ Please review our data practices:
 *Security:*
 • Encrypted storage (AES-256)
 • No third-party sharing
-• 90-day retention policy
-
-📋 Full policy: {policy_url}
-
-Reply *AGREE* to continue, or *DECLINE* to opt out.
-Reply *DELETE* anytime to erase your data.""",
-
-            "zh": """👋 *歡迎來到Sisters-On-WhatsApp！*
-
-我們是三位AI姐妹：
-🌸 *牡丹* - 直播與流行文化
-🎵 *芍藥* - 音樂與人生建議
-📚 *百合* - 書籍與創意思考
+• 90-day retention policy""" + _CONSENT_FOOTER_EN,
 
-🔒 *隱私聲明*
+            "zh": _CONSENT_HEADER_ZH + """🔒 *隱私聲明*
 請閱讀我們的資料處理方式：
 
 *收集的資料：*
@@ -397,12 +342,7 @@ Reply *DELETE* anytime to erase your data.""",
 *安全措施：*
 • 加密儲存 (AES-256)
 • 不與第三方分享
-• 90天保留政策
-
-📋 完整條款：{policy_url}
-
-回覆 *AGREE* 繼續，或 *DECLINE* 選擇退出。
-隨時回覆 *DELETE* 可刪除您的資料。"""
+• 90天保留政策""" + _CONSENT_FOOTER_ZH
         }
     }
 
@@ -456,51 +396,38 @@ Privacy info? Say "is my data safe?" """,
         }
     }
 
+    # Lookups are module-level functions (below); these wrappers keep the
+    # class API for existing callers
+
+    @staticmethod
+    def _country_prefix(phone_number: str) -> str:
+        """Normalize a phone number and keep "+" plus up to 4 digits (all detection looks at)."""
+        return _country_prefix(phone_number)
+
     @classmethod
     def detect_region(cls, phone_number: str) -> Region:
         """Detect region from phone number prefix."""
-        # Normalize phone number
-        phone = phone_number.replace("whatsapp:", "").replace(" ", "").replace("-", "")
-
-        if not phone.startswith("+"):
-            phone = "+" + phone
-
-        # Try to match longest prefix first
-        for prefix_len in range(5, 1, -1):
-            prefix = phone[:prefix_len]
-            if prefix in PHONE_PREFIX_TO_REGION:
-                return PHONE_PREFIX_TO_REGION[prefix]
+        return detect_region(phone_number)
 
-        return Region.DEFAULT
+    @classmethod
+    def get_region_and_policy_url(cls, phone_number: str) -> Tuple[Region, str]:
+        """Detect region and its policy URL from phone number prefix."""
+        return get_region_and_policy_url(phone_number)
 
     @classmethod
     def get_consent_message(cls, phone_number: str, language: str = "en") -> str:
         """Get consent message for user's region and language."""
-        region = cls.detect_region(phone_number)
-
-        messages = cls.CONSENT_MESSAGES.get(region, cls.CONSENT_MESSAGES[Region.DEFAULT])
-        message = messages.get(language, messages.get("en"))
-
-        policy_url = cls.POLICY_URLS.get(region, cls.POLICY_URLS[Region.DEFAULT])
-
-        return message.format(policy_url=policy_url)
+        return get_consent_message(phone_number, language)
 
     @classmethod
     def get_response(cls, response_type: str, language: str = "en") -> str:
         """Get response message."""
-        messages = cls.RESPONSE_MESSAGES.get(response_type, {})
-        return messages.get(language, messages.get("en", ""))
+        return get_response(response_type, language)
 
     @classmethod
     def get_privacy_info(cls, phone_number: str, language: str = "en") -> str:
         """Get privacy info message with region-specific policy URL."""
-        region = cls.detect_region(phone_number)
-        policy_url = cls.POLICY_URLS.get(region, cls.POLICY_URLS[Region.DEFAULT])
-
-        messages = cls.RESPONSE_MESSAGES.get("privacy_info", {})
-        message = messages.get(language, messages.get("en", ""))
-
-        return message.format(policy_url=policy_url)
+        return get_privacy_info(phone_number, language)
 
     # Natural language patterns for intent detection (English + Chinese only)
     INTENT_PATTERNS = {
@@ -527,28 +454,162 @@ Privacy info? Say "is my data safe?" """,
     @classmethod
     def is_consent_command(cls, message: str) -> Optional[str]:
         """Check if message contains intent using natural language patterns."""
-        msg_lower = message.strip().lower()
-        msg_upper = message.strip().upper()
-
-        # Legacy exact match commands (still supported)
-        if msg_upper in ["AGREE", "同意", "YES", "OK", "是"]:
-            return "agree"
-        elif msg_upper in ["DECLINE", "拒絕", "拒绝", "NO", "否"]:
-            return "decline"
-        elif msg_upper in ["DELETE", "刪除", "删除", "ERASE"]:
-            return "delete"
-        elif msg_upper in ["EXPORT", "匯出", "导出"]:
-            return "export"
-        elif msg_upper in ["PRIVACY", "隱私", "隐私", "POLICY", "政策"]:
-            return "privacy"
-        elif msg_upper in ["HELP", "幫助", "帮助", "?"]:
-            return "help"
-
-        # Natural language pattern matching
-        for intent, lang_patterns in cls.INTENT_PATTERNS.items():
-            for lang, patterns in lang_patterns.items():
-                for pattern in patterns:
-                    if pattern.lower() in msg_lower:
-                        return intent
-
-        return None
+        return is_consent_command(message)
+
+
+def _fill_policy_urls(messages_for) -> Dict[Region, Dict[str, str]]:
+    """Format per-language templates for every region with that region's policy URL."""
+    urls = PrivacyPolicyMessages.POLICY_URLS
+    return {
+        region: {
+            language: template.format(policy_url=urls.get(region, urls[Region.DEFAULT]))
+            for language, template in messages_for(region).items()
+        }
+        for region in Region
+    }
+
+
+# Ready-to-send texts per region and language (templates formatted once)
+_CONSENT_TEXTS = _fill_policy_urls(
+    lambda region: PrivacyPolicyMessages.CONSENT_MESSAGES.get(
+        region, PrivacyPolicyMessages.CONSENT_MESSAGES[Region.DEFAULT]
+    )
+)
+_PRIVACY_INFO_TEXTS = _fill_policy_urls(
+    lambda region: PrivacyPolicyMessages.RESPONSE_MESSAGES.get("privacy_info", {})
+)
+
+
+# Global alias so get_response() skips the class attribute lookup
+_RESPONSE_MESSAGES = PrivacyPolicyMessages.RESPONSE_MESSAGES
+
+# Legacy exact-match commands (upper-cased message -> intent)
+_EXACT_COMMANDS = {
+    **dict.fromkeys(["AGREE", "同意", "YES", "OK", "是"], "agree"),
+    **dict.fromkeys(["DECLINE", "拒絕", "拒绝", "NO", "否"], "decline"),
+    **dict.fromkeys(["DELETE", "刪除", "删除", "ERASE"], "delete"),
+    **dict.fromkeys(["EXPORT", "匯出", "导出"], "export"),
+    **dict.fromkeys(["PRIVACY", "隱私", "隐私", "POLICY", "政策"], "privacy"),
+    **dict.fromkeys(["HELP", "幫助", "帮助", "?"], "help"),
+}
+
+# Longer messages can't be an exact command, so they skip the upper() copy
+_EXACT_COMMAND_MAX_LEN = max(map(len, _EXACT_COMMANDS))
+
+# One alternation per intent, so each intent is a single regex scan; kept
+# per intent (not one combined regex) so earlier intents still take priority
+_INTENT_REGEXES = [
+    (intent, re.compile("|".join(
+        re.escape(pattern.lower())
+        for patterns in lang_patterns.values()
+        for pattern in patterns
+    )))
+    for intent, lang_patterns in PrivacyPolicyMessages.INTENT_PATTERNS.items()
+]
+
+
+# Normalized prefix per raw number; the same users message over and over,
+# so repeat lookups skip the string handling entirely
+@functools.lru_cache(maxsize=4096)
+def _country_prefix(phone_number: str) -> str:
+    phone = phone_number.removeprefix("whatsapp:").translate(_PHONE_STRIP_TABLE)
+
+    if not phone.startswith("+"):
+        phone = "+" + phone
+
+    return phone[:5]
+
+
+# Region lookups keyed by country prefix, so every subscriber number in a
+# country shares one cache slot
+@functools.lru_cache(maxsize=256)
+def _region_for_prefix(prefix: str) -> Region:
+    # Walk the trie digit by digit; the deepest region seen is the longest match
+    region = Region.DEFAULT
+    node = _PREFIX_TRIE
+    for digit in prefix[1:]:
+        node = node.get(digit)
+        if node is None:
+            break
+        region = node.get(_TRIE_REGION, region)
+
+    return region
+
+
+@functools.lru_cache(maxsize=256)
+def _region_and_policy_url(prefix: str) -> Tuple[Region, str]:
+    region = _region_for_prefix(prefix)
+    policy_url = PrivacyPolicyMessages.POLICY_URLS.get(
+        region, PrivacyPolicyMessages.POLICY_URLS[Region.DEFAULT]
+    )
+    return region, policy_url
+
+
+def detect_region(phone_number: str) -> Region:
+    """Detect region from phone number prefix."""
+    return _region_for_prefix(_country_prefix(phone_number))
+
+
+def get_region_and_policy_url(phone_number: str) -> Tuple[Region, str]:
+    """Detect region and its policy URL from phone number prefix."""
+    return _region_and_policy_url(_country_prefix(phone_number))
+
+
+def get_consent_message(phone_number: str, language: str = "en") -> str:
+    """Get consent message for user's region and language."""
+    messages = _CONSENT_TEXTS[detect_region(phone_number)]
+    try:
+        return messages[language]
+    except KeyError:
+        return messages.get("en")
+
+
+def get_response(response_type: str, language: str = "en") -> str:
+    """Get response message."""
+    try:
+        return _RESPONSE_MESSAGES[response_type][language]
+    except KeyError:
+        return _RESPONSE_MESSAGES.get(response_type, {}).get("en", "")
+
+
+def get_privacy_info(phone_number: str, language: str = "en") -> str:
+    """Get privacy info message with region-specific policy URL."""
+    messages = _PRIVACY_INFO_TEXTS[detect_region(phone_number)]
+    try:
+        return messages[language]
+    except KeyError:
+        return messages.get("en", "")
+
+
+# Longest stripped message whose intent is cached; keywords and short
+# phrases repeat constantly, long chat messages rarely do
+_INTENT_CACHE_MAX_LEN = 64
+
+
+def is_consent_command(message: str) -> Optional[str]:
+    """Check if message contains intent using natural language patterns."""
+    message = message.strip()
+    if len(message) <= _INTENT_CACHE_MAX_LEN:
+        return _cached_intent(message)
+    return _match_intent(message)
+
+
+@functools.lru_cache(maxsize=2048)
+def _cached_intent(message: str) -> Optional[str]:
+    return _match_intent(message)
+
+
+def _match_intent(message: str) -> Optional[str]:
+    # Legacy exact match commands (still supported)
+    if len(message) <= _EXACT_COMMAND_MAX_LEN:
+        intent = _EXACT_COMMANDS.get(message.upper())
+        if intent:
+            return intent
+
+    # Natural language pattern matching, intents in INTENT_PATTERNS order
+    msg_lower = message.lower()
+    for intent, pattern in _INTENT_REGEXES:
+        if pattern.search(msg_lower):
+            return intent
+
+    return None
@@ -1,6 +1,6 @@
 """Database models for session management."""
 
-from sqlalchemy import Column, String, DateTime, Text, Integer, create_engine
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -37,5 +37,11 @@ class ConversationHistory(Base):
     content = Column(Text, nullable=False)  # Encrypted content
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Latest message per user (retention scan in privacy.consent_manager)
+        Index("idx_conv_phone_ts", "phone_number", timestamp.desc()),
+        Index("idx_conv_hash_ts", "phone_hash", timestamp.desc()),
+    )
+
     def __repr__(self):
         return f"<ConversationHistory(phone={self.phone_number}, role={self.role})>"
@@ -2,5 +2,6 @@
 
 from .language_detector import detect_language, get_language_instruction
 from .admin_notifier import AdminNotifier
+from .semantic_cache import SemanticCache
 
-__all__ = ['detect_language', 'get_language_instruction', 'AdminNotifier']
+__all__ = ['detect_language', 'get_language_instruction', 'AdminNotifier', 'SemanticCache']
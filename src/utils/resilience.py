@@ -0,0 +1,129 @@
+"""Retry-with-backoff and circuit breaking for outbound API calls."""
+
+import time
+import logging
+from typing import Any, Awaitable, Callable
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+logger = logging.getLogger(__name__)
+
+# Transient network failures worth retrying (HTTP error statuses are not)
+RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.TransportError)
+
+
+async def call_with_retry(func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """
+    Await func(*args, **kwargs), retrying transient network errors.
+
+    Up to 3 attempts with jittered exponential backoff (0.2s start, 5s cap).
+    The last error is re-raised if every attempt fails.
+    """
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential_jitter(multiplier=0.2, max=5),
+        retry=retry_if_exception_type(RETRYABLE_ERRORS),
+        reraise=True,
+    ):
+        with attempt:
+            return await func(*args, **kwargs)
+
+
+def _is_outage(exc: BaseException) -> bool:
+    """
+    Whether an error points at the service failing rather than the request.
+
+    True for timeouts, transport errors and 5xx responses, including SDK
+    errors raised from one of those; client errors (4xx) are False.
+    """
+    while exc is not None:
+        if isinstance(exc, RETRYABLE_ERRORS):
+            return True
+        status = getattr(exc, "status_code", None)
+        if status is None:
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status >= 500
+        exc = exc.__cause__
+    return False
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Minimal in-memory circuit breaker for async calls.
+
+    After fail_max consecutive failures (timeouts, transport errors and 5xx
+    responses) the circuit opens and calls fail fast with CircuitOpenError.
+    Once reset_timeout seconds pass, a single trial call is let through
+    while the others keep failing fast: success closes the circuit, failure
+    re-opens it. Other errors such as 4xx still mean the service answered,
+    so they are re-raised but count as a success for the breaker.
+    """
+
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return (
+            self._opened_at is not None
+            and time.monotonic() - self._opened_at < self.reset_timeout
+        )
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Await func(*args, **kwargs) through the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with the
+                trial call still in flight
+        """
+        trial = self._opened_at is not None
+        if trial:
+            if self.is_open or self._trial_in_flight:
+                raise CircuitOpenError(f"{self.name} circuit open")
+            self._trial_in_flight = True
+
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            if _is_outage(e):
+                self._record_failure(trial)
+            else:
+                self._record_success()
+            raise
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+        self._record_success()
+        return result
+
+    def _record_failure(self, trial: bool) -> None:
+        self._failures += 1
+        # A failed trial call re-opens immediately
+        if self._failures >= self.fail_max or trial:
+            self._opened_at = time.monotonic()
+            logger.warning(f"⚡ {self.name} circuit opened after {self._failures} failures")
+
+    def _record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info(f"✅ {self.name} circuit closed")
+        self._failures = 0
+        self._opened_at = None
@@ -0,0 +1,150 @@
+"""Semantic response cache (optional embedding + FAISS index)."""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Return a stored response when a new prompt is nearly identical to an old one.
+
+    Exact repeats (after whitespace/case normalization) are answered from a
+    dict. Near repeats are found by cosine similarity over sentence
+    embeddings in a FAISS index, which requires the optional
+    ``sentence-transformers`` and ``faiss-cpu`` packages. Without them the
+    cache still serves exact repeats.
+
+    Every entry belongs to a context, compared exactly (e.g. a hash of the
+    system prompt and history). Near repeats are only searched within the
+    same context, so only the short text that varies is embedded and two
+    different conversations can never share an answer.
+    """
+
+    DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+        model_name: str = DEFAULT_MODEL
+    ):
+        """
+        Create an empty cache (the embedding model loads on first use).
+
+        Args:
+            threshold: Minimum cosine similarity for a near-repeat hit
+            max_entries: Entries kept before the cache starts over
+            model_name: sentence-transformers model used for embeddings
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.model_name = model_name
+
+        self._exact: Dict[Tuple[str, str], str] = {}
+        # context -> (FAISS index, responses in index order)
+        self._indexes: Dict[str, Tuple[Any, List[str]]] = {}
+        self._model = None
+        self._semantic_available = True
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _ensure_model(self) -> bool:
+        """Load the embedding model once. Returns availability."""
+        if self._model is not None or not self._semantic_available:
+            return self._semantic_available
+
+        try:
+            import faiss  # noqa: F401 (checked here, used in _new_index)
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            logger.info("Semantic cache: sentence-transformers/faiss not installed, exact matches only")
+            self._semantic_available = False
+            return False
+
+        self._model = SentenceTransformer(self.model_name)
+        return True
+
+    def _new_index(self):
+        import faiss
+        return faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension())
+
+    def _encode(self, text: str):
+        # Normalized vectors + inner product = cosine similarity
+        return self._model.encode(
+            [text],
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        ).astype("float32")
+
+    def get(self, text: str, context: str = "") -> Optional[str]:
+        """
+        Look up a cached response (blocking; embeds the text on a near-repeat lookup).
+
+        Args:
+            text: Text compared by similarity
+            context: Exact-match scope of the entry
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        key = self._normalize(text)
+
+        with self._lock:
+            if (context, key) in self._exact:
+                return self._exact[(context, key)]
+
+            scoped = self._indexes.get(context)
+            if scoped is None or not self._ensure_model():
+                return None
+
+            index, responses = scoped
+            scores, ids = index.search(self._encode(key), 1)
+            if ids[0][0] >= 0 and scores[0][0] >= self.threshold:
+                logger.info(f"🎯 Semantic cache hit (similarity: {scores[0][0]:.3f})")
+                return responses[ids[0][0]]
+
+        return None
+
+    def put(self, text: str, response: str, context: str = "") -> None:
+        """
+        Store a response (blocking; embeds the text).
+
+        Args:
+            text: Text compared by similarity
+            response: Response to return for this and similar texts
+            context: Exact-match scope of the entry
+        """
+        key = self._normalize(text)
+
+        with self._lock:
+            if (context, key) in self._exact:
+                return
+
+            # Flat indexes have no eviction; start over once full
+            if len(self._exact) >= self.max_entries:
+                self._exact.clear()
+                self._indexes.clear()
+
+            self._exact[(context, key)] = response
+
+            if self._ensure_model():
+                if context not in self._indexes:
+                    self._indexes[context] = (self._new_index(), [])
+                index, responses = self._indexes[context]
+                index.add(self._encode(key))
+                responses.append(response)
+
+    async def aget(self, text: str, context: str = "") -> Optional[str]:
+        """Async get() (embedding runs in a worker thread)."""
+        return await asyncio.to_thread(self.get, text, context)
+
+    async def aput(self, text: str, response: str, context: str = "") -> None:
+        """Async put() (embedding runs in a worker thread)."""
+        await asyncio.to_thread(self.put, text, response, context)
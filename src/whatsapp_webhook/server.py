@@ -16,8 +16,7 @@ import logging
 
 from ..config import Config
 from ..llm.factory import LLMFactory
-from ..llm.base import Message
-from ..characters.personality import CharacterPersonality
+from ..characters.personality import get_personality
 from ..routing.topic_analyzer import TopicAnalyzer
 from ..session.manager import SessionManager
 from ..moderation.openai_moderator import OpenAIModerator
@@ -25,7 +24,7 @@ from ..utils.language_detector import detect_language, get_language_instruction
 from ..utils.admin_notifier import AdminNotifier
 from ..memory.conversation_learner import ConversationLearner
 from ..privacy.consent_manager import ConsentManager
-from ..privacy.policy_messages import PrivacyPolicyMessages, Region
+from ..privacy.policy_messages import PrivacyPolicyMessages, is_consent_command
 from ..privacy.data_manager import DataManager
 from ..security.prompt_injection import PromptInjectionDetector
 
@@ -70,7 +69,7 @@ class SimpleSession:
 
 # Initialize components
 llm_provider = LLMFactory.create_provider()
-character_loader = CharacterPersonality()
+character_loader = get_personality()
 topic_analyzer = TopicAnalyzer()
 session_manager = SessionManager()  # PostgreSQL persistent sessions enabled
 # session_manager = SimpleSession()  # In-memory sessions (testing only)
@@ -79,7 +78,7 @@ injection_detector = PromptInjectionDetector()
 conversation_learner = ConversationLearner()
 admin_notifier = AdminNotifier()
 consent_manager = ConsentManager()
-data_manager = DataManager()
+data_manager = DataManager(consent_manager)
 
 # Ensure privacy tables exist
 try:
@@ -98,6 +97,18 @@ CHARACTER_EMOJIS = {
 logger.info(f"LLM Provider: {llm_provider.get_provider_name()}")
 
 
+@app.on_event("shutdown")
+async def flush_learned_facts():
+    """Fold the pending-facts journal into its snapshot before exit."""
+    conversation_learner.compact()
+
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    """Close pooled LLM provider HTTP clients."""
+    await LLMFactory.aclose_all()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -137,7 +148,7 @@ async def whatsapp_webhook(
         detected_language = detect_language(Body)
 
         # Step 0: Check for privacy commands (DELETE, EXPORT) - always allowed
-        consent_command = PrivacyPolicyMessages.is_consent_command(Body)
+        consent_command = is_consent_command(Body)
 
         if consent_command == "delete":
             # Handle data deletion request
@@ -174,8 +185,7 @@ async def whatsapp_webhook(
 
         if not user_consent:
             # New user - grant implicit consent and continue to chat
-            consent_manager.create_pending_consent(phone_number, detected_language)
-            consent_manager.grant_consent(phone_number)
+            consent_manager.create_granted_consent(phone_number, detected_language)
             logger.info(f"Implicit consent granted for new user {phone_number[:6]}...")
             # Continue to normal flow - don't return, let them chat immediately
 
@@ -212,8 +222,7 @@ async def whatsapp_webhook(
             language = detect_language(Body)
 
             # Get region-specific privacy URL
-            region = PrivacyPolicyMessages.detect_region(phone_number)
-            policy_url = PrivacyPolicyMessages.POLICY_URLS.get(region, PrivacyPolicyMessages.POLICY_URLS[Region.DEFAULT])
+            _, policy_url = PrivacyPolicyMessages.get_region_and_policy_url(phone_number)
 
             # Short, natural welcome message with embedded privacy info
             if language == 'zh':
@@ -302,19 +311,19 @@ async def whatsapp_webhook(
             limit=Config.CONVERSATION_HISTORY_LIMIT
         )
 
-        # Step 9: Build messages for LLM
-        messages = [Message(role="system", content=system_prompt)]
+        # Step 9: Build messages for LLM (plain dicts, sent to the API as-is)
+        messages = [{"role": "system", "content": system_prompt}]
 
         # Add conversation history (wrap user messages for injection defense)
         for msg in history:
             content = msg["content"]
             if msg["role"] == "user":
                 content = injection_detector.wrap_user_input(content)
-            messages.append(Message(role=msg["role"], content=content))
+            messages.append({"role": msg["role"], "content": content})
 
         # Add current user message (wrapped for injection defense)
         wrapped_body = injection_detector.wrap_user_input(Body)
-        messages.append(Message(role="user", content=wrapped_body))
+        messages.append({"role": "user", "content": wrapped_body})
 
         # Step 10: Generate response (with automatic failover)
         try:
@@ -389,8 +398,7 @@ async def whatsapp_webhook(
 
         # Append privacy URL if user asked about privacy
         if is_privacy_question:
-            region = PrivacyPolicyMessages.detect_region(phone_number)
-            policy_url = PrivacyPolicyMessages.POLICY_URLS.get(region, PrivacyPolicyMessages.POLICY_URLS[Region.DEFAULT])
+            _, policy_url = PrivacyPolicyMessages.get_region_and_policy_url(phone_number)
             if language == 'zh':
                 formatted_response += f"\n\n📋 完整隱私政策：{policy_url}"
             else:
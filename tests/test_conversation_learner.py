@@ -0,0 +1,33 @@
+"""Pending-facts journal: replay after a crash never duplicates facts."""
+
+from src.memory.conversation_learner import ConversationLearner
+
+
+def test_replay_skips_ops_already_in_snapshot(tmp_path):
+    facts_file = tmp_path / "pending_facts.json"
+    learner = ConversationLearner(facts_file)
+    learner.process_message("Actually, it's called 心斎橋焙煎所", "+10000000000")
+    learner.mark_verified("心斎橋焙煎所", {"passed": True})
+
+    # Crash after the snapshot is written but before the journal is truncated
+    journal = learner.journal_file.read_bytes()
+    learner.compact()
+    learner.journal_file.write_bytes(journal)
+
+    restarted = ConversationLearner(facts_file)
+
+    assert restarted.get_stats()["pending"] == 0
+    assert restarted.get_stats()["verified"] == 1
+
+
+def test_replay_applies_ops_after_snapshot(tmp_path):
+    facts_file = tmp_path / "pending_facts.json"
+    learner = ConversationLearner(facts_file)
+    learner.process_message("Actually, it's called 心斎橋焙煎所", "+10000000000")
+    learner.compact()
+    learner.mark_rejected("心斎橋焙煎所", "not found")
+
+    restarted = ConversationLearner(facts_file)
+
+    assert restarted.get_stats()["pending"] == 0
+    assert restarted.get_stats()["rejected"] == 1
@@ -0,0 +1,39 @@
+"""Fact-check verdict cache: only definite verdicts are reused."""
+
+import asyncio
+
+from src.grok import fact_checker as fact_checker_module
+from src.grok.fact_checker import FactChecker
+
+
+def _checker_answering(monkeypatch, answer):
+    calls = []
+
+    async def fake_ask(question, **kwargs):
+        calls.append(question)
+        return answer
+
+    monkeypatch.setattr(fact_checker_module, "ask_grok_no_search", fake_ask)
+    return FactChecker(), calls
+
+
+def _check_twice(checker, statement):
+    async def run():
+        return await checker.check(statement), await checker.check(statement)
+    return asyncio.run(run())
+
+
+def test_uncertain_verdict_is_rechecked(monkeypatch):
+    checker, calls = _checker_answering(monkeypatch, "I can't tell from the available information.")
+    first, second = _check_twice(checker, "Ichiran opened in 1960")
+
+    assert first["confidence"] == second["confidence"] == 0.5
+    assert len(calls) == 2
+
+
+def test_definite_verdict_is_cached(monkeypatch):
+    checker, calls = _checker_answering(monkeypatch, "CORRECT")
+    first, second = _check_twice(checker, "The capital of France is Paris")
+
+    assert first["passed"] and second["passed"]
+    assert len(calls) == 1
@@ -0,0 +1,91 @@
+"""Legacy token upgrade: rows mixing json and text fields are rewritten safely."""
+
+import base64
+import contextlib
+import re
+
+from src.privacy import data_manager as data_manager_module
+from src.privacy.data_manager import DataManager
+from src.privacy.encryption import EncryptedFieldManager
+
+
+class _FakeCursor:
+    """Serves SELECTs from an in-memory table; json columns come back as dict/list."""
+
+    def __init__(self, table):
+        self.table = table
+        self.selected = []
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        columns = [c.strip() for c in re.search(r"SELECT (.+?)\s+FROM", sql, re.S).group(1).split(",")]
+        self.selected.append(columns)
+        last_id, limit = params
+        matches = [
+            row for row in self.table
+            if row["id"] > last_id and any(
+                isinstance(row[c], str) and row[c].startswith("Z0FBQUFB") for c in columns[1:]
+            )
+        ]
+        self.rows = [tuple(row[c] for c in columns) for row in matches[:limit]]
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+
+def test_upgrade_skips_json_fields_in_mixed_row(monkeypatch):
+    field_manager = EncryptedFieldManager()
+    token = field_manager.encryption.encrypt("likes matcha")
+    legacy = base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+    row = {
+        "id": 1,
+        "phone_number": token,
+        "profile": legacy,
+        "preferences": {"drink": "matcha"},
+        "facts": ["has a cat"],
+        "topics_discussed": [],
+        "personality_notes": None,
+    }
+    cursor = _FakeCursor([row])
+
+    def fake_execute_values(cur, sql, argslist, page_size=100):
+        columns = re.search(r"AS data\((.+?)\)", sql).group(1).split(", ")
+        for values in argslist:
+            row.update(zip(columns[1:], values[1:]))
+
+    monkeypatch.setattr(data_manager_module, "execute_values", fake_execute_values)
+
+    manager = DataManager(consent_manager=object())
+    monkeypatch.setattr(manager, "_connection", lambda: contextlib.nullcontext(_FakeConnection(cursor)))
+
+    assert manager.upgrade_legacy_tokens("user_memories") == 1
+
+    assert row["profile"] == token
+    assert row["phone_number"] == token
+    assert row["preferences"] == {"drink": "matcha"}
+    assert row["facts"] == ["has a cat"]
+    assert "preferences" not in cursor.selected[0]
+
+
+def test_unwrap_legacy_token_returns_non_strings_unchanged():
+    encryption = EncryptedFieldManager().encryption
+    value = {"drink": "matcha"}
+    assert encryption.unwrap_legacy_token(value) is value
@@ -0,0 +1,25 @@
+"""Provider registry: one instance per (provider_type, model), all closed on shutdown."""
+
+import asyncio
+
+from src.llm.factory import LLMFactory
+
+
+def test_providers_are_reused_and_closed(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(LLMFactory, "_providers", {})
+
+    providers = [LLMFactory.create_provider("openai", f"model-{i}") for i in range(10)]
+    assert LLMFactory.create_provider("openai", "model-0") is providers[0]
+    assert list(LLMFactory._providers.values()) == providers
+
+    closed = []
+    for provider in providers:
+        async def aclose(provider=provider):
+            closed.append(provider)
+        monkeypatch.setattr(provider, "aclose", aclose)
+
+    asyncio.run(LLMFactory.aclose_all())
+
+    assert closed == providers
+    assert LLMFactory._providers == {}
@@ -0,0 +1,41 @@
+"""Verified knowledge injection into character prompts."""
+
+import json
+
+from src.characters.personality import CharacterPersonality
+
+
+def _personality(tmp_path, facts):
+    (tmp_path / "botan_system_prompt.txt").write_text("You are Botan.", encoding="utf-8")
+    knowledge_file = tmp_path / "verified_knowledge.json"
+    knowledge_file.write_text(json.dumps({"restaurants": {
+        name: {"details": {"type": "restaurant"}, "confidence": 0.9} for name in facts
+    }}), encoding="utf-8")
+    return CharacterPersonality(prompts_dir=tmp_path), knowledge_file
+
+
+def test_reload_after_knowledge_file_removed_drops_facts(tmp_path):
+    personality, knowledge_file = _personality(tmp_path, ["Ichiran"])
+    assert "Ichiran" in personality._get_relevant_verified_knowledge("I love ichiran")
+
+    knowledge_file.unlink()
+    personality.reload_prompts()
+
+    assert personality._get_relevant_verified_knowledge("I love ichiran") == ""
+
+
+def test_names_match_whole_words_only(tmp_path):
+    personality, _ = _personality(tmp_path, ["Art", "Ramen", "Ramen Nagi", "一蘭"])
+    match = personality._get_relevant_verified_knowledge
+
+    assert match("Let's start with ramenya food") == ""
+    assert "Art" in match("I love art!")
+    assert "Ramen Nagi" in match("ramen nagi was great")
+    assert "Ramen Nagi" not in match("ramen nagisa was great")
+    assert "一蘭" in match("昨日一蘭に行った")
+
+
+def test_matching_is_the_same_without_ahocorasick(tmp_path, monkeypatch):
+    from src.characters import personality as personality_module
+    monkeypatch.setattr(personality_module, "ahocorasick", None)
+    test_names_match_whole_words_only(tmp_path)
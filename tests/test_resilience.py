@@ -0,0 +1,101 @@
+"""Circuit breaker: only service failures count towards opening the circuit."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.utils.resilience import CircuitBreaker, CircuitOpenError
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    response = httpx.Response(status, request=REQUEST)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=REQUEST, response=response)
+
+
+class _SDKConnectionError(Exception):
+    """Like openai/anthropic APIConnectionError: raised from the httpx error."""
+
+
+async def _fail_with(exc: Exception):
+    raise exc
+
+
+async def _raise_sdk_error():
+    try:
+        raise httpx.ConnectError("connection refused", request=REQUEST)
+    except httpx.ConnectError as e:
+        raise _SDKConnectionError("Connection error.") from e
+
+
+def _call(breaker: CircuitBreaker, func, *args):
+    return asyncio.run(breaker.call(func, *args))
+
+
+def test_client_errors_do_not_open_circuit():
+    breaker = CircuitBreaker("Test", fail_max=2)
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            _call(breaker, _fail_with, _status_error(400))
+    assert not breaker.is_open
+
+
+@pytest.mark.parametrize("error", [
+    _status_error(503),
+    httpx.ReadTimeout("timed out", request=REQUEST),
+])
+def test_service_failures_open_circuit(error):
+    breaker = CircuitBreaker("Test", fail_max=2)
+    for _ in range(2):
+        with pytest.raises(type(error)):
+            _call(breaker, _fail_with, error)
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        _call(breaker, _fail_with, error)
+
+
+def test_sdk_errors_raised_from_transport_errors_count():
+    breaker = CircuitBreaker("Test", fail_max=1)
+    with pytest.raises(_SDKConnectionError):
+        _call(breaker, _raise_sdk_error)
+    assert breaker.is_open
+
+
+def test_client_error_resets_failure_count():
+    breaker = CircuitBreaker("Test", fail_max=2)
+    with pytest.raises(httpx.HTTPStatusError):
+        _call(breaker, _fail_with, _status_error(503))
+    with pytest.raises(httpx.HTTPStatusError):
+        _call(breaker, _fail_with, _status_error(404))
+    with pytest.raises(httpx.HTTPStatusError):
+        _call(breaker, _fail_with, _status_error(503))
+    assert not breaker.is_open
+
+
+def test_half_open_admits_a_single_trial_call():
+    breaker = CircuitBreaker("Test", fail_max=1, reset_timeout=0.0)
+    with pytest.raises(httpx.HTTPStatusError):
+        _call(breaker, _fail_with, _status_error(503))
+
+    release = asyncio.Event()
+    trial_calls = 0
+
+    async def slow_ok():
+        nonlocal trial_calls
+        trial_calls += 1
+        await release.wait()
+        return "ok"
+
+    async def run():
+        trial = asyncio.create_task(breaker.call(slow_ok))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await asyncio.wait_for(breaker.call(slow_ok), timeout=1)
+        release.set()
+        return await trial
+
+    assert asyncio.run(run()) == "ok"
+    assert trial_calls == 1
+    assert _call(breaker, slow_ok) == "ok"
@@ -0,0 +1,90 @@
+"""Response cache scoping: different conversations never share a cached reply."""
+
+import asyncio
+
+from src.llm.base import LLMProvider
+from src.utils.semantic_cache import SemanticCache
+
+
+class _FakeIndex:
+    """Stands in for a FAISS index where every embedding is identical."""
+
+    def __init__(self):
+        self.ntotal = 0
+
+    def add(self, vectors):
+        self.ntotal += 1
+
+    def search(self, vectors, k):
+        if self.ntotal == 0:
+            return [[0.0]], [[-1]]
+        return [[1.0]], [[self.ntotal - 1]]
+
+
+def _collapsing_cache() -> SemanticCache:
+    """Cache whose embeddings all collide (worst case of a truncating model)."""
+    cache = SemanticCache()
+    cache._ensure_model = lambda: True
+    cache._new_index = _FakeIndex
+    cache._encode = lambda text: [[1.0]]
+    return cache
+
+
+class _CountingProvider(LLMProvider):
+    def __init__(self):
+        super().__init__(api_key="test", model="test")
+        self.calls = 0
+
+    async def _generate(self, messages, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        return f"reply {self.calls}"
+
+    async def generate_stream(self, messages, temperature=0.7, max_tokens=None):
+        yield await self._generate(messages, temperature, max_tokens)
+
+    def get_provider_name(self) -> str:
+        return "Test"
+
+
+SYSTEM_PROMPT = {"role": "system", "content": "You are Botan. " * 200}
+
+
+def test_conversations_with_same_character_do_not_share_cache_hits():
+    provider = _CountingProvider()
+    provider.response_cache = _collapsing_cache()
+
+    alice = [
+        SYSTEM_PROMPT,
+        {"role": "user", "content": "My cat is called Mochi"},
+        {"role": "assistant", "content": "Cute name!"},
+        {"role": "user", "content": "What is my cat called?"},
+    ]
+    bob = [
+        SYSTEM_PROMPT,
+        {"role": "user", "content": "My dog is called Rex"},
+        {"role": "assistant", "content": "Great name!"},
+        {"role": "user", "content": "What is my cat called?"},
+    ]
+
+    async def run():
+        return await provider.generate(alice), await provider.generate(bob)
+
+    alice_reply, bob_reply = asyncio.run(run())
+
+    assert alice_reply == "reply 1"
+    assert bob_reply == "reply 2"
+    assert provider.calls == 2
+
+
+def test_same_conversation_near_repeat_is_served_from_cache():
+    provider = _CountingProvider()
+    provider.response_cache = _collapsing_cache()
+
+    first = [SYSTEM_PROMPT, {"role": "user", "content": "hi!"}]
+    again = [SYSTEM_PROMPT, {"role": "user", "content": "hello"}]
+
+    async def run():
+        return await provider.generate(first), await provider.generate(again)
+
+    assert asyncio.run(run()) == ("reply 1", "reply 1")
+    assert provider.calls == 1